@@ -0,0 +1,247 @@
+# benchmarks/run.py
+"""Headless benchmarks for the Database operations behind the GUI's hot paths.
+
+Usage (from the src directory, no display needed):
+    python -m benchmarks.run [--items 5000] [--orders 20000] [--years 2]
+                             [--repeat 5] [--output results.json] [--compare previous.json]
+    python -m benchmarks.run --db copy-of-inventory.db [--include-writes]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from database.inventory_db import Database
+from benchmarks.synthetic import barcode_for, generate_database
+from database.barcode_cache import BarcodeCache
+from database.sales_journal import SalesJournal
+from reports.report_cache import ReportCache
+
+# Barcode lookups per timed scan run
+SCANS = 100
+
+# Carts placed per timed checkout run
+CHECKOUT_ORDERS = 50
+CHECKOUT_LINES = 5
+
+# Checkouts running at once in the concurrent checkout runs
+CHECKOUT_THREADS = 4
+
+# Terminal id the reserved checkout runs hold their stock under
+BENCH_TILL = "bench-till"
+
+
+def timed(func, repeat):
+    """Run func() `repeat` times; return (timings in ms, result of the last run)."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, result
+
+
+def row_count(result):
+    if isinstance(result, dict):
+        return len(result.get("rows", ()))
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return None
+
+
+def concurrent_checkout(db_path, carts, place, threads=CHECKOUT_THREADS):
+    """Call place(db, cart) for every cart from `threads` threads at once, each with its own connection."""
+    def worker(share):
+        db = Database(db_path)
+        try:
+            for cart in share:
+                place(db, cart)
+        finally:
+            db.close()
+
+    workers = [threading.Thread(target=worker, args=(carts[i::threads],)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+
+def python_report_aggregation(db, start_date, end_date):
+    """The per-item aggregation SalesReport used to do in Python over raw sale rows.
+
+    Kept as a baseline so runs show what the SQL aggregation saves.
+    """
+    aggregated = {}
+    for sale in db.iter_sales_between_dates(start_date, end_date):
+        if sale.item_name in aggregated:
+            aggregated[sale.item_name][0] += sale.quantity
+            aggregated[sale.item_name][1] += sale.total_price
+        else:
+            aggregated[sale.item_name] = [sale.quantity, sale.total_price]
+    return sorted(aggregated.items(), key=lambda x: x[1][0], reverse=True)
+
+
+def run_benchmarks(db_path, repeat, include_writes=True):
+    """Time the hot Database operations against `db_path`; returns {name: stats}.
+
+    The checkout cases place real orders, so they are skipped unless include_writes is set.
+    The journaled ones hold stock for BENCH_TILL first, as a till's cart does,
+    and are timed next to direct checkouts of the same carts.
+    """
+    db = Database(db_path)
+    rng = random.Random(7)
+    catalogue = db.connection.execute("SELECT item_id, name, price FROM Items").fetchall()
+    item_ids = [row[0] for row in catalogue]
+    end = datetime.now()
+    year_ago = end - timedelta(days=365)
+    month_ago = end - timedelta(days=30)
+    middle_id = item_ids[len(item_ids) // 2] if item_ids else None
+    orders = db.connection.execute("SELECT order_date, order_id FROM orders ORDER BY order_id").fetchall()
+    middle_order = tuple(orders[len(orders) // 2]) if orders else None
+    cache = ReportCache()
+    barcodes = BarcodeCache()
+    scanned = [barcode_for(rng.choice(item_ids)) for _ in range(SCANS)] if item_ids else []
+
+    def checkout():
+        for _ in range(CHECKOUT_ORDERS):
+            cart = [(item_id, name, price, 1)
+                    for item_id, name, price in rng.sample(catalogue, min(CHECKOUT_LINES, len(catalogue)))]
+            db.place_order(cart)
+
+    # Reserved checkouts use the best-stocked items, so the holds outlast every repeat
+    held = db.connection.execute(
+        "SELECT item_id, name, price FROM Items ORDER BY quantity DESC LIMIT ?", (CHECKOUT_LINES * 4,)
+    ).fetchall()
+
+    def reserved_carts():
+        return [[(item_id, name, price, 1) for item_id, name, price in rng.sample(held, min(CHECKOUT_LINES, len(held)))]
+                for _ in range(CHECKOUT_ORDERS)]
+
+    journal = None
+    cases = {}
+    if include_writes:
+        cases["checkout_place_order_x50"] = checkout
+        if held:
+            journal = SalesJournal(db_path, BENCH_TILL)
+            for item_id, name, price in held:
+                db.reserve_stock(item_id, CHECKOUT_ORDERS * repeat * 3, terminal_id=BENCH_TILL)
+
+            def journaled(threads):
+                carts = reserved_carts()
+                if threads == 1:
+                    for cart in carts:
+                        journal.place_order(db, cart)
+                else:
+                    concurrent_checkout(db_path, carts, journal.place_order, threads)
+
+            cases["checkout_journaled_x50"] = lambda: journaled(1)
+            cases[f"checkout_journaled_x50_{CHECKOUT_THREADS}threads"] = lambda: journaled(CHECKOUT_THREADS)
+            cases[f"checkout_direct_x50_{CHECKOUT_THREADS}threads"] = lambda: concurrent_checkout(
+                db_path, reserved_carts(), lambda thread_db, cart: thread_db.place_order(cart, BENCH_TILL)
+            )
+    cases.update({
+        "fetch_all_items": db.fetch_all_items,
+        "iter_items": lambda: sum(1 for _ in db.iter_items()),
+        "fetch_items_page_first": lambda: db.fetch_items_page(None),
+        "fetch_items_page_middle": lambda: db.fetch_items_page(middle_id),
+        "get_sales_between_dates_30d": lambda: db.get_sales_between_dates(month_ago, end),
+        "get_sales_between_dates_365d": lambda: db.get_sales_between_dates(year_ago, end),
+        "aggregate_sales_item_30d": lambda: db.aggregate_sales(month_ago, end),
+        "aggregate_sales_item_365d": lambda: db.aggregate_sales(year_ago, end),
+        "aggregate_sales_item_365d_top50": lambda: db.aggregate_sales(year_ago, end, limit=50),
+        "aggregate_sales_item_365d_cached": lambda: cache.aggregate_sales(db, year_ago, end),
+        "aggregate_sales_order_30d": lambda: db.aggregate_sales(month_ago, end, group_by="order", limit=50),
+        "python_report_aggregation_365d": lambda: python_report_aggregation(db, year_ago, end),
+        "fetch_orders_page_first": lambda: db.fetch_orders_page(None),
+        "fetch_orders_page_middle": lambda: db.fetch_orders_page(middle_order),
+        "fetch_order": lambda: db.fetch_order(middle_order[1]) if middle_order else None,
+        "search_items": lambda: db.search_items("hammer tape"),
+        "barcode_scan_x100": lambda: [barcodes.lookup(db, barcode) for barcode in scanned],
+    })
+
+    results = {}
+    try:
+        for name, func in cases.items():
+            timings, result = timed(func, repeat)
+            results[name] = {
+                "median_ms": round(statistics.median(timings), 3),
+                "min_ms": round(min(timings), 3),
+                "max_ms": round(max(timings), 3),
+                "runs": repeat,
+                "rows": row_count(result),
+            }
+    finally:
+        if journal is not None:
+            journal.close()
+            db.release_reservations(BENCH_TILL)
+        db.close()
+    return results
+
+
+def compare(results, previous):
+    """Print median timings next to those of a previous run."""
+    print(f"\n{'benchmark':34} {'previous':>12} {'current':>12} {'change':>9}")
+    for name, stats in results.items():
+        before = previous.get("results", {}).get(name)
+        if not before:
+            print(f"{name:34} {'-':>12} {stats['median_ms']:>10.3f}ms {'new':>9}")
+            continue
+        change = (stats["median_ms"] - before["median_ms"]) / before["median_ms"] * 100 if before["median_ms"] else 0
+        print(f"{name:34} {before['median_ms']:>10.3f}ms {stats['median_ms']:>10.3f}ms {change:>+8.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the inventory database hot paths")
+    parser.add_argument("--db", help="Benchmark an existing database instead of generating one")
+    parser.add_argument("--include-writes", action="store_true",
+                        help="Also time checkout against --db (places real orders in it)")
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    scale = None
+    if args.db:
+        db_path = args.db
+    else:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="inventory-bench-"), "bench.db")
+        start = time.perf_counter()
+        scale = generate_database(db_path, args.items, args.orders, args.years, seed=args.seed)
+        print(f"Generated {scale} in {time.perf_counter() - start:.1f}s at {db_path}")
+
+    results = run_benchmarks(db_path, args.repeat, include_writes=not args.db or args.include_writes)
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "scale": scale or {"db": db_path},
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    for name, stats in results.items():
+        print(f"{name:34} median {stats['median_ms']:>10.3f}ms  rows {stats['rows']}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fp:
+            compare(results, json.load(fp))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(report, fp, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
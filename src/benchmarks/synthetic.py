@@ -0,0 +1,91 @@
+# benchmarks/synthetic.py
+import os
+import random
+from datetime import datetime, timedelta
+from database.inventory_db import Database, to_timestamp
+
+# Rows per executemany batch while generating
+BATCH_SIZE = 10000
+
+
+def generate_database(path, items=5000, orders=20000, years=2, max_lines=5, seed=42):
+    """Create a synthetic inventory database at `path` (replacing any existing file).
+
+    `orders` orders with 1..max_lines sale lines each are spread evenly at random
+    over the last `years` years. Returns {"items": ..., "orders": ..., "sales": ...}.
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    rng = random.Random(seed)
+    db = Database(path)
+    connection = db.connection
+    cursor = connection.cursor()
+    try:
+        catalogue = {}
+        batch = []
+        for item_id in range(1, items + 1):
+            name = f"Item {item_id:06d} {rng.choice(WORDS)} {rng.choice(WORDS)}"
+            price = round(rng.uniform(0.5, 200), 2)
+            catalogue[item_id] = (name, price)
+            batch.append((item_id, name, price, rng.randint(1000, 100000), barcode_for(item_id)))
+            if len(batch) >= BATCH_SIZE:
+                cursor.executemany("INSERT INTO Items (item_id, name, price, quantity, barcode) VALUES (?, ?, ?, ?, ?)", batch)
+                batch = []
+        cursor.executemany("INSERT INTO Items (item_id, name, price, quantity, barcode) VALUES (?, ?, ?, ?, ?)", batch)
+        connection.commit()
+
+        end = datetime.now().replace(microsecond=0)
+        span = int(timedelta(days=365 * years).total_seconds())
+        moments = sorted(end - timedelta(seconds=rng.randrange(span)) for _ in range(orders))
+
+        sales = 0
+        order_rows, sale_rows = [], []
+        for order_id, moment in enumerate(moments, start=1):
+            order_date = moment.strftime('%Y-%m-%d %H:%M:%S')
+            sale_ts = to_timestamp(moment)
+            total, count = 0.0, 0
+            for item_id in rng.sample(range(1, items + 1), min(items, rng.randint(1, max_lines))):
+                quantity = rng.randint(1, 5)
+                name, price = catalogue[item_id]
+                total += price * quantity
+                count += quantity
+                sale_rows.append((order_id, item_id, name, price, quantity, price * quantity, order_date, sale_ts))
+            order_rows.append((order_id, total, count, order_date))
+
+            if len(sale_rows) >= BATCH_SIZE:
+                sales += _flush(cursor, order_rows, sale_rows)
+                order_rows, sale_rows = [], []
+        sales += _flush(cursor, order_rows, sale_rows)
+        connection.commit()
+        cursor.execute("ANALYZE")
+        connection.commit()
+    finally:
+        db.close()
+
+    return {"items": items, "orders": orders, "sales": sales}
+
+
+def barcode_for(item_id):
+    """The synthetic EAN-13-length barcode of an item."""
+    return f"{2000000000000 + item_id}"
+
+
+def _flush(cursor, order_rows, sale_rows):
+    cursor.executemany(
+        "INSERT INTO orders (order_id, order_total, total_items, order_date) VALUES (?, ?, ?, ?)",
+        order_rows
+    )
+    cursor.executemany("""
+        INSERT INTO sales (order_id, item_id, item_name, unit_price, quantity, total_price, sale_date, sale_ts)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, sale_rows)
+    return len(sale_rows)
+
+
+WORDS = (
+    "apple", "bolt", "cable", "drill", "eraser", "filter", "glue", "hammer", "ink", "jar",
+    "kettle", "lamp", "marker", "nail", "oil", "paper", "quilt", "rope", "soap", "tape",
+    "umbrella", "valve", "washer", "yarn", "zipper",
+)
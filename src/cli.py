@@ -0,0 +1,153 @@
+# cli.py
+"""Maintenance commands that run without opening the GUI.
+
+Usage (from the src directory):
+    python cli.py rebuild-rollup [--db inventory.db]
+    python cli.py import-items FILE [--format csv|jsonl] [--chunk-size N]
+    python cli.py export-items FILE [--format csv|jsonl]
+    python cli.py export-sales FILE [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--format csv|jsonl]
+    python cli.py export-orders FILE [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--format csv|jsonl]
+    python cli.py replay-journal [--journal FILE]
+    python cli.py archive-sales [--before YYYY] [--vacuum]
+"""
+import argparse
+import sys
+from datetime import datetime
+from database.inventory_db import Database
+from database.bulk_items import IMPORT_CHUNK_SIZE, import_items_file, export_items_file
+from database.bulk_sales import export_sales_file, export_orders_file
+from database.sales_journal import replay_journal, replay_journals
+
+# Start of the range when --from is not given
+EARLIEST_DATE = datetime(1970, 1, 1)
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a YYYY-MM-DD date")
+
+
+def rebuild_rollup(args):
+    db = Database(args.db)
+    try:
+        rows = db.rebuild_daily_item_sales()
+        print(f"Rebuilt daily_item_sales: {rows} day/item rows.")
+    finally:
+        db.close()
+
+
+def import_items(args):
+    db = Database(args.db)
+    try:
+        imported, rejected = import_items_file(db, args.file, args.format, args.chunk_size)
+    finally:
+        db.close()
+    print(f"Imported {imported} item(s), rejected {len(rejected)}.")
+    for line_number, reason in rejected:
+        print(f"  line {line_number}: {reason}", file=sys.stderr)
+
+
+def export_items(args):
+    db = Database(args.db)
+    try:
+        written = export_items_file(db, args.file, args.format)
+    finally:
+        db.close()
+    print(f"Exported {written} item(s) to {args.file}.")
+
+
+def export_sales(args):
+    db = Database(args.db)
+    try:
+        written = export_sales_file(db, args.file, args.start, args.end, args.format)
+    finally:
+        db.close()
+    print(f"Exported {written} sale line(s) from {args.start.date()} to {args.end.date()} to {args.file}.")
+
+
+def export_orders(args):
+    db = Database(args.db)
+    try:
+        written = export_orders_file(db, args.file, args.start, args.end, args.format)
+    finally:
+        db.close()
+    print(f"Exported {written} order(s) from {args.start.date()} to {args.end.date()} to {args.file}.")
+
+
+def replay_sales_journal(args):
+    if args.journal:
+        applied = replay_journal(args.db, args.journal)
+    else:
+        applied = replay_journals(args.db)
+    print(f"Applied {applied} journaled order(s).")
+
+
+def archive_sales(args):
+    if args.before > datetime.now().year:
+        sys.exit("Only closed years can be archived; --before cannot be after the current year.")
+    db = Database(args.db)
+    try:
+        years = db.unarchived_years(args.before)
+        for year in years:
+            sales, orders = db.archive_sales_year(year)
+            print(f"Archived {year}: {sales} sale line(s), {orders} order(s).")
+        if not years:
+            print(f"No sales before {args.before} left to archive.")
+        if args.vacuum:
+            db.vacuum()
+            print(f"Compacted {args.db}.")
+    finally:
+        db.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Inventory Management System maintenance commands")
+    parser.add_argument("--db", default="inventory.db", help="Path to the inventory database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-rollup", help="Recompute the daily sales rollup from raw sales")
+    rebuild.set_defaults(func=rebuild_rollup)
+
+    importer = commands.add_parser("import-items", help="Upsert items from a CSV or JSONL file")
+    importer.add_argument("file")
+    importer.add_argument("--format", choices=("csv", "jsonl"), help="Defaults to the file extension")
+    importer.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Rows per transaction")
+    importer.set_defaults(func=import_items)
+
+    exporter = commands.add_parser("export-items", help="Write all items to a CSV or JSONL file")
+    exporter.add_argument("file")
+    exporter.add_argument("--format", choices=("csv", "jsonl"), help="Defaults to the file extension")
+    exporter.set_defaults(func=export_items)
+
+    for name, func, what in (("export-sales", export_sales, "sale lines"), ("export-orders", export_orders, "orders")):
+        sales_exporter = commands.add_parser(name, help=f"Stream {what} in a date range to a CSV or JSONL file")
+        sales_exporter.add_argument("file")
+        sales_exporter.add_argument("--from", dest="start", type=parse_date, default=EARLIEST_DATE,
+                                    help="First day to include (default: all history)")
+        sales_exporter.add_argument("--to", dest="end", type=parse_date, default=datetime.now(),
+                                    help="Last day to include (default: today)")
+        sales_exporter.add_argument("--format", choices=("csv", "jsonl"), help="Defaults to the file extension")
+        sales_exporter.set_defaults(func=func)
+
+    replay = commands.add_parser("replay-journal", help="Apply orders left in the sales journals of stopped tills")
+    replay.add_argument("--journal", help="One journal file (default: every till's journal next to the database)")
+    replay.set_defaults(func=replay_sales_journal)
+
+    archiver = commands.add_parser("archive-sales", help="Move closed years of sales and orders to per-year files")
+    archiver.add_argument("--before", type=int, default=datetime.now().year,
+                          help="Archive every year before this one (default: the current year)")
+    archiver.add_argument("--vacuum", action="store_true", help="Compact the database file afterwards")
+    archiver.set_defaults(func=archive_sales)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
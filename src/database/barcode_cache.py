@@ -0,0 +1,56 @@
+# barcode_cache.py
+
+class BarcodeCache:
+    """In-process map from barcode to (item_id, name, price, stock) for scan-to-cart.
+
+    Entries are filled on first scan by an indexed lookup and kept correct by
+    reading the item change log (item_changes) since the last change_seq seen:
+    edited items are refreshed in place and deleted or re-coded items dropped.
+    A scan therefore costs one dict lookup plus a read of any changes since
+    the previous scan; the Items table is never scanned.
+    """
+
+    def __init__(self):
+        self.entries = {}   # barcode -> (item_id, name, price, quantity)
+        self.barcodes = {}  # item_id -> barcode, to find entries from the change log
+        self.change_seq = None
+
+    def lookup(self, db, barcode):
+        """Return (item_id, name, price, quantity) for a barcode, or None if no item has it."""
+        self.sync(db)
+        entry = self.entries.get(barcode)
+        if entry is None:
+            item = db.fetch_item_by_barcode(barcode)
+            if item is None:
+                return None
+            entry = self.store(item)
+        return entry
+
+    def sync(self, db):
+        """Apply item changes recorded since the last sync."""
+        if self.change_seq is None:
+            # Nothing cached yet, so only the starting position is needed
+            self.change_seq = db.latest_item_change()
+            return
+        self.change_seq, changes = db.fetch_item_changes(self.change_seq)
+        self.apply_changes(changes)
+
+    def apply_changes(self, changes):
+        """Refresh or drop cached entries for (item_id, item) pairs from Database.fetch_item_changes."""
+        for item_id, item in changes:
+            old_barcode = self.barcodes.pop(item_id, None)
+            if old_barcode is not None:
+                self.entries.pop(old_barcode, None)
+                if item is not None and item.barcode:
+                    self.store(item)
+
+    def store(self, item):
+        entry = (item.item_id, item.name, item.price, item.quantity)
+        self.entries[item.barcode] = entry
+        self.barcodes[item.item_id] = item.barcode
+        return entry
+
+    def clear(self):
+        self.entries = {}
+        self.barcodes = {}
+        self.change_seq = None
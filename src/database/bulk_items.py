@@ -0,0 +1,133 @@
+# bulk_items.py
+import csv
+import json
+import math
+import os
+
+# Rows written per executemany transaction during an import
+IMPORT_CHUNK_SIZE = 5000
+
+# Rows read per keyset page during an export
+EXPORT_PAGE_SIZE = 5000
+
+# Column order used for CSV files
+ITEM_FIELDS = ("name", "price", "quantity")
+
+
+def detect_format(path, fmt=None):
+    """Return 'csv' or 'jsonl', from `fmt` if given or else from the file extension."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt == "json":
+        fmt = "jsonl"
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Unsupported file format '{fmt}' (use csv or jsonl)")
+    return fmt
+
+
+def read_item_records(fp, fmt):
+    """Yield (line_number, record dict) from a CSV (with header) or JSONL stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(fp)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_number, line in enumerate(fp, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, {"_error": f"invalid JSON: {e}"}
+
+
+def validate_item_record(record):
+    """Return (name, price, quantity) for a record, or raise ValueError with the reason."""
+    if not isinstance(record, dict):
+        raise ValueError("record is not an object")
+    if "_error" in record:
+        raise ValueError(record["_error"])
+
+    name = str(record.get("name") or "").strip()
+    if not name:
+        raise ValueError("item name is required")
+    try:
+        price = float(record.get("price"))
+    except (TypeError, ValueError):
+        raise ValueError(f"price '{record.get('price')}' is not a number")
+    try:
+        quantity = int(record.get("quantity"))
+    except (TypeError, ValueError):
+        raise ValueError(f"quantity '{record.get('quantity')}' is not an integer")
+    if not math.isfinite(price):
+        raise ValueError(f"price '{record.get('price')}' is not a number")
+    if price < 0:
+        raise ValueError("price must not be negative")
+    if quantity < 0:
+        raise ValueError("quantity must not be negative")
+    return name, price, quantity
+
+
+def import_items(db, records, chunk_size=IMPORT_CHUNK_SIZE):
+    """Upsert item records into the Items table in chunked transactions.
+
+    `records` is an iterable of (line_number, record) as produced by
+    read_item_records, so the input is never held in memory as a whole.
+    Returns (imported, rejected) where rejected is a list of (line_number, reason).
+    """
+    imported = 0
+    rejected = []
+    chunk = []
+    for line_number, record in records:
+        try:
+            chunk.append(validate_item_record(record))
+        except ValueError as e:
+            rejected.append((line_number, str(e)))
+            continue
+        if len(chunk) >= chunk_size:
+            imported += db.upsert_items(chunk)
+            chunk = []
+    if chunk:
+        imported += db.upsert_items(chunk)
+    return imported, rejected
+
+
+def import_items_file(db, path, fmt=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """Import a CSV or JSONL item file; see import_items."""
+    fmt = detect_format(path, fmt)
+    with open(path, newline="", encoding="utf-8") as fp:
+        return import_items(db, read_item_records(fp, fmt), chunk_size)
+
+
+def export_items(db, fp, fmt):
+    """Stream the whole Items table to `fp` page by page; returns the number of rows written."""
+    writer = None
+    if fmt == "csv":
+        writer = csv.writer(fp)
+        writer.writerow(("item_id",) + ITEM_FIELDS)
+
+    written = 0
+    last_id = None
+    while True:
+        page = db.fetch_items_page(last_id, EXPORT_PAGE_SIZE)
+        if not page:
+            break
+        for item in page:
+            if writer:
+                writer.writerow((item.item_id, item.name, item.price, item.quantity))
+            else:
+                fp.write(json.dumps({
+                    "item_id": item.item_id, "name": item.name, "price": item.price, "quantity": item.quantity
+                }) + "\n")
+        written += len(page)
+        last_id = page[-1].item_id
+        if len(page) < EXPORT_PAGE_SIZE:
+            break
+    return written
+
+
+def export_items_file(db, path, fmt=None):
+    """Export the Items table to a CSV or JSONL file; see export_items."""
+    fmt = detect_format(path, fmt)
+    with open(path, "w", newline="", encoding="utf-8") as fp:
+        return export_items(db, fp, fmt)
@@ -0,0 +1,52 @@
+# bulk_sales.py
+import csv
+import json
+from database.bulk_items import detect_format
+from models.order import Order
+from models.sales import Sale
+
+
+def write_records(fp, fmt, fields, records):
+    """Stream model objects to `fp` as CSV (with header) or JSONL; returns the number written."""
+    writer = None
+    if fmt == "csv":
+        writer = csv.writer(fp)
+        writer.writerow(fields)
+
+    written = 0
+    for record in records:
+        values = [getattr(record, field) for field in fields]
+        if writer:
+            writer.writerow(values)
+        else:
+            fp.write(json.dumps(dict(zip(fields, values))) + "\n")
+        written += 1
+    return written
+
+
+def export_sales(db, fp, fmt, start_date, end_date):
+    """Stream the sale lines of whole days start_date..end_date to `fp`; returns the row count.
+
+    Rows are pulled from SQLite in fetchmany batches, so memory use does not
+    depend on the size of the range.
+    """
+    return write_records(fp, fmt, Sale.COLUMNS, db.iter_sales_between_dates(start_date, end_date))
+
+
+def export_orders(db, fp, fmt, start_date, end_date):
+    """Stream the orders placed on whole days start_date..end_date to `fp`; returns the row count."""
+    return write_records(fp, fmt, Order.COLUMNS, db.iter_orders_between_dates(start_date, end_date))
+
+
+def export_sales_file(db, path, start_date, end_date, fmt=None):
+    """Export sale lines to a CSV or JSONL file; see export_sales."""
+    fmt = detect_format(path, fmt)
+    with open(path, "w", newline="", encoding="utf-8") as fp:
+        return export_sales(db, fp, fmt, start_date, end_date)
+
+
+def export_orders_file(db, path, start_date, end_date, fmt=None):
+    """Export orders to a CSV or JSONL file; see export_orders."""
+    fmt = detect_format(path, fmt)
+    with open(path, "w", newline="", encoding="utf-8") as fp:
+        return export_orders(db, fp, fmt, start_date, end_date)
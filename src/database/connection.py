@@ -0,0 +1,170 @@
+# connection.py
+import atexit
+import functools
+import os
+import random
+import sqlite3
+import threading
+import time
+
+# How long (ms) SQLite itself waits on a lock held by another terminal
+BUSY_TIMEOUT_MS = 5000
+
+# After busy_timeout runs out, writes are retried this many times with jittered backoff
+BUSY_RETRIES = 4
+BUSY_BACKOFF = 0.05  # seconds, doubled on every retry
+
+# SQLite journal mode, e.g. INVENTORY_JOURNAL_MODE=DELETE. WAL (the default) needs
+# every till on the same host as the database file: its shared-memory index does
+# not work over a network filesystem, so tills opening a shared drive must use DELETE.
+JOURNAL_MODE_ENV = "INVENTORY_JOURNAL_MODE"
+JOURNAL_MODES = ("WAL", "DELETE", "TRUNCATE", "PERSIST")
+
+# Pragmas applied to every connection handed out by the manager, after the journal mode
+PRAGMAS = (
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    "PRAGMA cache_size = -16000",       # ~16 MB page cache
+    "PRAGMA mmap_size = 67108864",      # 64 MB memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+def journal_mode():
+    """The configured journal mode (INVENTORY_JOURNAL_MODE), WAL by default."""
+    mode = os.environ.get(JOURNAL_MODE_ENV, "").strip().upper() or "WAL"
+    if mode not in JOURNAL_MODES:
+        raise ValueError(f"{JOURNAL_MODE_ENV} must be one of {', '.join(JOURNAL_MODES)}, not {mode!r}")
+    return mode
+
+
+def open_connection(db_name):
+    """Open a new sqlite3 connection with the standard tuning applied."""
+    connection = sqlite3.connect(db_name)
+    mode = journal_mode()
+    connection.execute(f"PRAGMA journal_mode = {mode}")
+    # NORMAL is only crash-safe in WAL mode; rollback journals need FULL
+    connection.execute(f"PRAGMA synchronous = {'NORMAL' if mode == 'WAL' else 'FULL'}")
+    for pragma in PRAGMAS:
+        connection.execute(pragma)
+    return connection
+
+
+def is_busy_error(error):
+    """True if `error` means another connection is holding the database lock."""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+
+def retry_on_busy(method):
+    """Retry a Database write method when another terminal holds the lock.
+
+    Any half-finished transaction is rolled back before the next attempt, so
+    the wrapped method always starts from a clean state.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        delay = BUSY_BACKOFF
+        for attempt in range(BUSY_RETRIES + 1):
+            try:
+                return method(self, *args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt == BUSY_RETRIES:
+                    raise
+                if self.connection.in_transaction:
+                    self.connection.rollback()
+                time.sleep(delay + random.uniform(0, delay))
+                delay *= 2
+    return wrapper
+
+
+class ConnectionManager:
+    """Hands out one shared, tuned connection per database file and thread.
+
+    Every Database() acquires its connection here instead of opening its own.
+    sqlite3 connections belong to the thread that opened them, so the Tk thread
+    and each background worker get their own. Connections are reference
+    counted and closed when the last user releases them (or at interpreter
+    exit), and the schema only needs to be set up the first time a file is
+    opened in this process.
+    """
+
+    def __init__(self):
+        self._connections = {}
+        self._refcounts = {}
+        self._initialized = set()
+        self._schema_ready = {}  # schema key -> Event set once the first user has set the schema up
+        self._lock = threading.Lock()
+
+    def _key(self, db_name):
+        path = db_name if db_name == ":memory:" else os.path.abspath(db_name)
+        return path, threading.get_ident()
+
+    def _schema_key(self, key):
+        # Every in-memory connection is a separate database
+        path, _ = key
+        return key if path == ":memory:" else path
+
+    def acquire(self, db_name):
+        """Return (connection, needs_schema) for the given database file.
+
+        Only the first caller for a file gets needs_schema; it must call
+        schema_ready() once the schema is set up. Callers on other threads
+        wait for that, so they never query a half-migrated database.
+        """
+        key = self._key(db_name)
+        with self._lock:
+            if key not in self._connections:
+                self._connections[key] = open_connection(db_name)
+                self._refcounts[key] = 0
+            self._refcounts[key] += 1
+
+            schema_key = self._schema_key(key)
+            needs_schema = schema_key not in self._initialized
+            if needs_schema:
+                self._initialized.add(schema_key)
+                self._schema_ready[schema_key] = threading.Event()
+            ready = self._schema_ready[schema_key]
+            connection = self._connections[key]
+        if not needs_schema:
+            ready.wait()
+        return connection, needs_schema
+
+    def schema_ready(self, db_name):
+        """Let other threads use a file whose schema this thread has just set up."""
+        with self._lock:
+            ready = self._schema_ready.get(self._schema_key(self._key(db_name)))
+        if ready is not None:
+            ready.set()
+
+    def release(self, db_name):
+        """Drop one reference; the connection is closed when none are left."""
+        key = self._key(db_name)
+        with self._lock:
+            if key not in self._connections:
+                return
+            self._refcounts[key] -= 1
+            if self._refcounts[key] <= 0:
+                self._close(key)
+
+    def _close(self, key):
+        connection = self._connections.pop(key)
+        self._refcounts.pop(key, None)
+        try:
+            connection.close()
+        except sqlite3.ProgrammingError:
+            # Owned by a worker thread that is already gone; the OS reclaims it
+            pass
+        # An in-memory database is gone once its connection closes
+        if key[0] == ":memory:":
+            self._initialized.discard(key)
+            self._schema_ready.pop(key, None)
+
+    def close_all(self):
+        """Close every open connection, e.g. at interpreter exit."""
+        with self._lock:
+            for key in list(self._connections):
+                self._close(key)
+
+
+connection_manager = ConnectionManager()
+atexit.register(connection_manager.close_all)
@@ -0,0 +1,160 @@
+# executor.py
+import queue
+import threading
+from database.inventory_db import Database
+
+# How often (ms) the Tk thread checks for finished jobs while any are pending
+POLL_INTERVAL = 50
+
+# Executor lanes: till work (checkout, cart holds, item edits) never queues behind
+# reports, analytics or bulk import/export on the background lane
+TILL_LANE = "till"
+BACKGROUND_LANE = "background"
+
+
+class QueryJob:
+    """A unit of database work queued on a QueryExecutor."""
+
+    def __init__(self, executor, func, args, on_done, on_error):
+        self.executor = executor
+        self.func = func
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cancelled = False
+
+    def cancel(self):
+        """Drop the job; if it is already running its query is interrupted."""
+        self.cancelled = True
+        self.executor.interrupt(self)
+
+
+class QueryExecutor:
+    """Runs database work on a background thread so the Tk mainloop never blocks.
+
+    Jobs are plain callables invoked as func(db, *args) on the worker, which owns
+    its own Database connection. Results come back on the Tk thread: the
+    executor polls a result queue with root.after and calls on_done(result) or
+    on_error(exception). Busy listeners are told when work starts and stops so
+    windows can show an indicator.
+
+    Each lane has its own executor, worker thread and connection, so a long
+    job on one lane never delays the jobs queued on another.
+    """
+
+    def __init__(self, root, db_name="inventory.db", lane=BACKGROUND_LANE):
+        self.root = root
+        self.db_name = db_name
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.busy_listeners = []
+        self.pending = 0
+        self.poll_job = None
+        self.current_job = None
+        self.worker_db = None
+        self.lock = threading.Lock()
+        self.lane = lane
+        self.thread = threading.Thread(target=self._run_worker, name=f"query-executor-{lane}", daemon=True)
+        self.thread.start()
+
+    def submit(self, func, *args, on_done=None, on_error=None):
+        """Queue func(db, *args) on the worker and return its QueryJob. Call from the Tk thread."""
+        job = QueryJob(self, func, args, on_done, on_error)
+        self.pending += 1
+        if self.pending == 1:
+            self._notify_busy(True)
+        self.jobs.put(job)
+        self._schedule_poll()
+        return job
+
+    def interrupt(self, job):
+        """Abort the statement `job` is running, if it is the current one."""
+        with self.lock:
+            if self.current_job is job and self.worker_db is not None:
+                # sqlite3 allows interrupt() from another thread
+                self.worker_db.connection.interrupt()
+
+    def add_busy_listener(self, callback):
+        """callback(busy) is called on the Tk thread when the executor starts or stops working."""
+        self.busy_listeners.append(callback)
+        if self.pending:
+            callback(True)
+
+    def remove_busy_listener(self, callback):
+        if callback in self.busy_listeners:
+            self.busy_listeners.remove(callback)
+
+    def shutdown(self):
+        """Stop the worker once the queued jobs are done."""
+        self.jobs.put(None)
+
+    def _run_worker(self):
+        self.worker_db = Database(self.db_name)
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is None:
+                    break
+                if job.cancelled:
+                    self.results.put((job, None, None))
+                    continue
+
+                with self.lock:
+                    self.current_job = job
+                try:
+                    result, error = job.func(self.worker_db, *job.args), None
+                except Exception as e:
+                    result, error = None, e
+                    # Leave the connection usable for the next job
+                    if self.worker_db.connection.in_transaction:
+                        self.worker_db.connection.rollback()
+                with self.lock:
+                    self.current_job = None
+                self.results.put((job, result, error))
+        finally:
+            self.worker_db.close()
+
+    def _schedule_poll(self):
+        if self.poll_job is None:
+            self.poll_job = self.root.after(POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        self.poll_job = None
+        while True:
+            try:
+                job, result, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            self.pending -= 1
+            if job.cancelled:
+                continue
+            if error is None:
+                if job.on_done:
+                    job.on_done(result)
+            elif job.on_error:
+                job.on_error(error)
+            else:
+                print(f"Background query failed: {error}")
+
+        if self.pending:
+            self._schedule_poll()
+        else:
+            self._notify_busy(False)
+
+    def _notify_busy(self, busy):
+        for callback in list(self.busy_listeners):
+            callback(busy)
+
+
+_executors = {}
+
+
+def get_executor(widget, db_name="inventory.db", lane=BACKGROUND_LANE):
+    """Return the process-wide QueryExecutor of a lane for the Tk application `widget` belongs to."""
+    root = widget.nametowidget(".")
+    key = (id(root), db_name, lane)
+    if key not in _executors:
+        _executors[key] = QueryExecutor(root, db_name, lane)
+    return _executors[key]
+
@@ -0,0 +1,45 @@
+# file_lock.py
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLocked(Exception):
+    """Another process holds the lock."""
+
+
+def lock_file(path):
+    """Take an exclusive lock on the file at `path` (created if missing); returns the open file.
+
+    Raises FileLocked if another process holds it. The lock goes away with
+    the file's handle, so a process that crashed never leaves it behind.
+    """
+    fp = open(path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(fp.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            fp.seek(0)
+            msvcrt.locking(fp.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        fp.close()
+        raise FileLocked(f"{path} is locked by another process")
+    return fp
+
+
+def unlock_file(fp):
+    if fcntl is None:
+        fp.seek(0)
+        msvcrt.locking(fp.fileno(), msvcrt.LK_UNLCK, 1)
+    fp.close()
+
+
+def is_locked(path):
+    """True if another running process holds the lock on `path`."""
+    try:
+        unlock_file(lock_file(path))
+    except FileLocked:
+        return True
+    return False
@@ -0,0 +1,183 @@
+# instrumentation.py
+import functools
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Set INVENTORY_DB_PROFILE=1 to instrument every Database() in the process
+PROFILE_ENV = "INVENTORY_DB_PROFILE"
+
+# Calls slower than this (ms) are logged with the query plans of their statements
+SLOW_QUERY_MS = 100
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = (1, 5, 10, 50, 100, 500, 1000)
+
+# Slow calls kept for the summary
+SLOW_LOG_SIZE = 50
+
+# Where dump() appends its summaries
+STATS_LOG = "query_stats.log"
+
+# Methods that are never wrapped
+UNTIMED = {"close", "enable_instrumentation"}
+
+
+def profiling_requested():
+    """True if the environment asks for Database instrumentation."""
+    return os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+
+class MethodStats:
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, elapsed_ms, rows):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows or 0
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if elapsed_ms < bound:
+                self.histogram[index] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+
+class QueryStats:
+    """Process-wide per-method timings, row counts and a slow-query log.
+
+    Statements are captured with sqlite3's trace callback while an instrumented
+    method runs; when the call is slow each statement is logged together with
+    its EXPLAIN QUERY PLAN.
+    """
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self.methods = {}
+        self.slow_calls = deque(maxlen=SLOW_LOG_SIZE)
+        self.started = datetime.now()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def _frames(self):
+        if not hasattr(self.local, "frames"):
+            self.local.frames = []
+        return self.local.frames
+
+    def trace(self, statement):
+        """sqlite3 trace callback: attribute the statement to every active call on this thread."""
+        if getattr(self.local, "explaining", False) or statement.lstrip().startswith("--"):
+            return  # Our own EXPLAIN, or a statement run inside a trigger
+        for frame in self._frames():
+            # Each trigger program a statement fires reports the outer statement again
+            if not frame or frame[-1] != statement:
+                frame.append(statement)
+
+    def instrument(self, db):
+        """Wrap the public methods of a Database instance with timing and statement capture."""
+        db.connection.set_trace_callback(self.trace)
+        for name in dir(type(db)):
+            if name.startswith("_") or name in UNTIMED:
+                continue
+            method = getattr(db, name)
+            if callable(method):
+                setattr(db, name, self._wrap(db, name, method))
+
+    def _wrap(self, db, name, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            frames = self._frames()
+            statements = []
+            frames.append(statements)
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                frames.pop()
+            self.record(db, name, elapsed_ms, count_rows(result), statements)
+            return result
+        return timed
+
+    def record(self, db, name, elapsed_ms, rows, statements):
+        with self.lock:
+            self.methods.setdefault(name, MethodStats()).add(elapsed_ms, rows)
+        if elapsed_ms >= self.slow_ms:
+            plans = [(statement, self.explain(db, statement)) for statement in statements]
+            with self.lock:
+                self.slow_calls.append((datetime.now(), name, elapsed_ms, plans))
+
+    def explain(self, db, statement):
+        """EXPLAIN QUERY PLAN for a captured statement, as text lines."""
+        keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        if keyword not in ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT"):
+            return []
+        self.local.explaining = True
+        try:
+            rows = db.connection.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+            return [row[-1] for row in rows]
+        except Exception as e:
+            return [f"(plan unavailable: {e})"]
+        finally:
+            self.local.explaining = False
+
+    def summary(self):
+        """Human-readable summary of everything recorded so far."""
+        with self.lock:
+            methods = sorted(self.methods.items(), key=lambda entry: entry[1].total_ms, reverse=True)
+            slow_calls = list(self.slow_calls)
+
+        bucket_names = [f"<{bound}ms" for bound in LATENCY_BUCKETS] + [f">={LATENCY_BUCKETS[-1]}ms"]
+        lines = [f"Database query stats since {self.started:%Y-%m-%d %H:%M:%S}", ""]
+        lines.append(f"{'method':28} {'calls':>7} {'total ms':>10} {'avg ms':>8} {'max ms':>8} {'rows':>9}  histogram")
+        for name, stats in methods:
+            histogram = " ".join(f"{label}:{count}" for label, count in zip(bucket_names, stats.histogram) if count)
+            lines.append(
+                f"{name:28} {stats.calls:>7} {stats.total_ms:>10.1f} {stats.total_ms / stats.calls:>8.2f} "
+                f"{stats.max_ms:>8.1f} {stats.rows:>9}  {histogram}"
+            )
+
+        if slow_calls:
+            lines += ["", f"Slow calls (>= {self.slow_ms} ms):"]
+            for moment, name, elapsed_ms, plans in slow_calls:
+                lines.append(f"  {moment:%H:%M:%S} {name} {elapsed_ms:.1f} ms")
+                for statement, plan in plans:
+                    lines.append(f"    SQL: {' '.join(statement.split())}")
+                    for step in plan:
+                        lines.append(f"      PLAN: {step}")
+        return "\n".join(lines)
+
+    def dump(self, path=STATS_LOG):
+        """Append the summary to `path` (and print it); does nothing if nothing was recorded."""
+        if not self.methods:
+            return None
+        text = self.summary()
+        print(text)
+        if path:
+            with open(path, "a", encoding="utf-8") as fp:
+                fp.write(text + "\n\n")
+        return text
+
+
+def count_rows(result):
+    """Rows returned by a Database method, for the common result shapes."""
+    if result is None or isinstance(result, (bool, int, float, str)):
+        return 0
+    if isinstance(result, dict):
+        return len(result.get("rows", ()))
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, tuple) or hasattr(result, "__slots__"):
+        return 1  # A single row or model object
+    return 0
+
+
+query_stats = QueryStats()
@@ -1,14 +1,214 @@
 # inventory_db.py
+import calendar
+import os
+import re
+import socket
 import sqlite3
-from datetime import datetime
+import tempfile
+import time as clock
+from datetime import datetime, time, timedelta
+from database.connection import connection_manager, retry_on_busy
+from database.file_lock import FileLocked, is_locked, lock_file
+from database.instrumentation import query_stats, profiling_requested
+from models.item import Item
+from models.order import Order
+from models.sales import Sale
+from models.user import User
+
+SECONDS_PER_DAY = 86400
+
+# Grouping keys and sort orders accepted by Database.aggregate_sales
+SALES_GROUPS = {
+    "item": "item_name",
+    "item_id": "item_id",
+    "day": "date(sale_date)",
+    "order": "order_id",
+}
+# Groupings that can be answered from the daily_item_sales rollup
+ROLLUP_GROUPS = {
+    "item": "item_name",
+    "item_id": "item_id",
+    "day": "date(day * 86400, 'unixepoch')",
+}
+SALES_ORDERS = {
+    "quantity": "quantity DESC, group_key ASC",
+    "revenue": "revenue DESC, group_key ASC",
+    "name": "group_key ASC",
+}
+
+# Rows fetched per page by the virtualized items table
+ITEMS_PAGE_SIZE = 200
+
+# Most item changes returned by one Database.fetch_item_changes call
+ITEM_CHANGES_LIMIT = 500
+
+# Orders per page of Database.fetch_orders_page (order history)
+ORDERS_PAGE_SIZE = 100
+
+# Default number of matches returned by Database.search_items
+SEARCH_LIMIT = 50
+
+# Set INVENTORY_TILL_ID to name this till instead of using the host name
+TILL_ID_ENV = "INVENTORY_TILL_ID"
+
+# Cart reservations lapse on their own after this many seconds without activity
+RESERVATION_TTL = 15 * 60
+
+# Most rows returned by Database.fetch_low_stock
+LOW_STOCK_LIMIT = 100
+
+# Rows pulled from SQLite per fetchmany() by the iter_* methods
+FETCH_BATCH_SIZE = 1000
+
+# Explicit, table-qualified column lists, so typed rows do not depend on the
+# table's column order and stay unambiguous in joins
+ITEM_COLUMNS = ", ".join(f"Items.{column}" for column in Item.COLUMNS)
+ORDER_COLUMNS = ", ".join(f"orders.{column}" for column in Order.COLUMNS)
+SALE_COLUMNS = ", ".join(f"sales.{column}" for column in Sale.COLUMNS)
+USER_COLUMNS = ", ".join(f"Users.{column}" for column in User.COLUMNS)
+
+# Schema migrations in the order they were introduced. PRAGMA user_version holds
+# how many have been applied; append new steps, never reorder or remove them.
+SCHEMA_MIGRATIONS = (
+    "create_base_tables",
+    "migrate_sales_timestamps",
+    "create_daily_sales_rollup",
+    "create_item_change_log",
+    "create_item_search_index",
+    "create_stock_reservations",
+    "create_low_stock_watchlist",
+    "add_item_barcodes",
+    "add_order_journal_ids",
+    "create_sales_archives",
+    "create_order_history_indexes",
+    "add_archive_watermarks",
+)
+SCHEMA_VERSION = len(SCHEMA_MIGRATIONS)
+
+# Rows per statement when back-filling new columns on an existing database
+MIGRATION_CHUNK_SIZE = 5000
+
+# Columns copied into sales archives, in table order
+ARCHIVE_SALE_COLUMNS = ", ".join(Sale.COLUMNS)
+ARCHIVE_ORDER_COLUMNS = ", ".join(Order.COLUMNS)
+
+
+def to_timestamp(moment):
+    """Seconds since the epoch for a naive local datetime, without timezone shifts.
+
+    This matches SQLite's strftime('%s', sale_date) on the stored text dates,
+    so values written by Python and back-filled by SQL line up exactly.
+    """
+    return calendar.timegm(moment.timetuple())
+
+
+def terminal_lock_path(terminal_id):
+    """The lock file a running till holds on its terminal id, in this host's temp folder."""
+    safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", terminal_id)
+    return os.path.join(tempfile.gettempdir(), f"inventory-till-{safe_id}.lock")
+
+
+def claim_terminal_id():
+    """Pick this process's terminal id and lock it; returns (terminal_id, lock file).
+
+    The id is INVENTORY_TILL_ID or the host name, so a restarted till takes
+    back the id, and with it the holds, of its previous run. If another
+    running process on this host already holds that id, this one becomes
+    <host name>:<pid> instead, so two tills never share stock reservations.
+    """
+    preferred = os.environ.get(TILL_ID_ENV, "").strip() or socket.gethostname()
+    try:
+        return preferred, lock_file(terminal_lock_path(preferred))
+    except FileLocked:
+        terminal_id = f"{socket.gethostname()}:{os.getpid()}"
+        print(f"Terminal id '{preferred}' is in use by another till on this host; using '{terminal_id}'.")
+        return terminal_id, lock_file(terminal_lock_path(terminal_id))
+
+
+def timestamp_text(timestamp):
+    """The stored date text ('%Y-%m-%d %H:%M:%S') of a to_timestamp() value."""
+    return (datetime(1970, 1, 1) + timedelta(seconds=timestamp)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def day_bounds(start_date, end_date):
+    """(first second, last second) timestamps covering whole days start_date..end_date."""
+    start = datetime.combine(start_date.date(), time.min)
+    end = datetime.combine(end_date.date(), time(23, 59, 59))
+    return to_timestamp(start), to_timestamp(end)
+
+
+def year_bounds(year):
+    """(first second, last second) timestamps of a calendar year."""
+    return to_timestamp(datetime(year, 1, 1)), to_timestamp(datetime(year + 1, 1, 1)) - 1
+
+
+# Identifies this till in stock_reservations when several terminals share one database.
+# Held under an exclusive lock for as long as the process runs (see claim_terminal_id).
+TERMINAL_ID, TERMINAL_LOCK = claim_terminal_id()
+
+# Timestamps covering every possible sale, for reads over the whole history
+ALL_TIME = (to_timestamp(datetime(1, 1, 1)), to_timestamp(datetime(9999, 12, 31, 23, 59, 59)))
+
+
+def archive_file_name(db_name, year):
+    """File name of a year's sales archive: inventory.db -> inventory-sales-2023.db, in the same folder."""
+    stem, extension = os.path.splitext(os.path.basename(db_name))
+    return f"{stem}-sales-{year}{extension or '.db'}"
+
+
+def iterate_rows(cursor, batch_size=FETCH_BATCH_SIZE):
+    """Yield the rows of an executed cursor, pulling them from SQLite batch_size at a time."""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield from rows
+
 
 class Database:
     def __init__(self, db_name="inventory.db"):
-        self.connection = sqlite3.connect(db_name)
+        # Windows share one tuned connection per file; the schema is only set up on first use
+        self.db_name = db_name
+        self.connection, needs_schema = connection_manager.acquire(db_name)
         self.cursor = self.connection.cursor()
-        self.create_tables()
+        self.closed = False
+        if needs_schema:
+            try:
+                self.create_tables()
+            finally:
+                connection_manager.schema_ready(db_name)
+        if profiling_requested():
+            self.enable_instrumentation()
+
+    def enable_instrumentation(self, slow_ms=None):
+        """Opt in to per-method timing, row counts and slow-query plans for this instance.
+
+        Results accumulate in database.instrumentation.query_stats; call its
+        dump() for a summary. Setting INVENTORY_DB_PROFILE=1 does this for every
+        Database() in the process.
+        """
+        if slow_ms is not None:
+            query_stats.slow_ms = slow_ms
+        query_stats.instrument(self)
+
+    def schema_version(self):
+        """Number of SCHEMA_MIGRATIONS already applied to this database."""
+        return self.cursor.execute("PRAGMA user_version").fetchone()[0]
 
     def create_tables(self):
+        """Apply the schema migrations this database has not had yet.
+
+        An up-to-date database costs a single PRAGMA read. Every step is also
+        safe to re-run, so databases from before versioning (user_version 0)
+        are brought up to date by running them all once.
+        """
+        version = self.schema_version()
+        for number, step in enumerate(SCHEMA_MIGRATIONS[version:], start=version + 1):
+            getattr(self, step)()
+            self.cursor.execute(f"PRAGMA user_version = {number}")
+            self.connection.commit()
+
+    def create_base_tables(self):
         # Create Users table
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS Users (
@@ -25,7 +225,9 @@ class Database:
                 item_id INTEGER PRIMARY KEY,
                 name TEXT UNIQUE NOT NULL,
                 price REAL NOT NULL CHECK(price >= 0),
-                quantity INTEGER NOT NULL CHECK(quantity >= 0)
+                quantity INTEGER NOT NULL CHECK(quantity >= 0),
+                reorder_level INTEGER NOT NULL DEFAULT 0 CHECK(reorder_level >= 0),
+                barcode TEXT
             )
         ''')
 
@@ -40,6 +242,7 @@ class Database:
                 quantity INTEGER,
                 total_price REAL,
                 sale_date TEXT,
+                sale_ts INTEGER,
                 FOREIGN KEY(order_id) REFERENCES orders(order_id),
                 FOREIGN KEY(item_id) REFERENCES items(item_id)
             )
@@ -51,7 +254,8 @@ class Database:
                 order_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 order_total REAL,
                 total_items INTEGER,
-                order_date TEXT
+                order_date TEXT,
+                journal_id TEXT
             )
         """)
         self.connection.commit()
@@ -59,6 +263,356 @@ class Database:
         # Check if the Admin user exists; if not, add a default Admin
         self.create_default_admin()
 
+    def migrate_sales_timestamps(self):
+        """Add and index the integer sale_ts column on databases that predate it.
+
+        The back-fill runs in small committed chunks so other terminals are never
+        locked out for long while an existing inventory.db is upgraded.
+        """
+        columns = [row[1] for row in self.cursor.execute("PRAGMA table_info(sales)")]
+        if "sale_ts" not in columns:
+            self.cursor.execute("ALTER TABLE sales ADD COLUMN sale_ts INTEGER")
+            self.connection.commit()
+
+        while True:
+            self.cursor.execute("""
+                UPDATE sales SET sale_ts = CAST(strftime('%s', sale_date) AS INTEGER)
+                WHERE sale_id IN (
+                    SELECT sale_id FROM sales WHERE sale_ts IS NULL AND sale_date IS NOT NULL LIMIT ?
+                )
+            """, (MIGRATION_CHUNK_SIZE,))
+            self.connection.commit()
+            if self.cursor.rowcount < MIGRATION_CHUNK_SIZE:
+                break
+
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_sale_ts ON sales(sale_ts)")
+        self.connection.commit()
+
+    def create_daily_sales_rollup(self):
+        """Create the per-day, per-item sales rollup and the trigger that maintains it.
+
+        Every insert into sales (add_sale, place_order, ...) folds into
+        daily_item_sales, so range reports sum at most one row per item per day.
+        """
+        self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_item_sales'"
+        )
+        exists = self.cursor.fetchone() is not None
+
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS daily_item_sales (
+                day INTEGER NOT NULL,
+                item_id INTEGER NOT NULL,
+                item_name TEXT,
+                quantity INTEGER NOT NULL DEFAULT 0,
+                revenue REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, item_id)
+            )
+        """)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_sales_daily_rollup
+            AFTER INSERT ON sales
+            WHEN NEW.sale_ts IS NOT NULL
+            BEGIN
+                INSERT INTO daily_item_sales (day, item_id, item_name, quantity, revenue)
+                VALUES (NEW.sale_ts / 86400, NEW.item_id, NEW.item_name, NEW.quantity, NEW.total_price)
+                ON CONFLICT (day, item_id) DO UPDATE SET
+                    item_name = excluded.item_name,
+                    quantity = quantity + excluded.quantity,
+                    revenue = revenue + excluded.revenue;
+            END
+        """)
+        self.connection.commit()
+
+        # Existing databases need their history folded in once (sales_archives comes later, so nothing is archived yet)
+        if not exists:
+            self.rebuild_daily_item_sales(archives=False)
+
+    def rebuild_daily_item_sales(self, archives=True):
+        """Recompute daily_item_sales from the raw sales, archived years included.
+
+        Archived years are totalled first, a batch of archives at a time, into
+        a temp table; the rollup is then replaced from those totals and this
+        database's sales in one transaction. If a year is archived in between,
+        the totals are taken again.
+        """
+        cursor = self.connection.cursor()
+        while True:
+            cursor.execute("DROP TABLE IF EXISTS temp.archived_item_sales")
+            cursor.execute("CREATE TEMP TABLE archived_item_sales (day, item_id, item_name, quantity, revenue)")
+            self.connection.commit()
+            catalogue = self._archive_catalogue() if archives else None
+            windows = self._archive_windows(*ALL_TIME) if archives else ()
+            for window_start, window_end, batch in windows:
+                if not batch:
+                    continue
+                sales, params = self._union_partitions(
+                    "SELECT sale_ts, item_id, item_name, quantity, total_price FROM {schema}.sales"
+                    " WHERE sale_ts BETWEEN ? AND ? {sales_visible}",
+                    (window_start, window_end), self._attach_archives(batch), main=False
+                )
+                cursor.execute(f"""
+                    INSERT INTO temp.archived_item_sales
+                    SELECT sale_ts / 86400, item_id, MAX(item_name), SUM(quantity), SUM(total_price)
+                    FROM ({sales})
+                    WHERE item_id IS NOT NULL
+                    GROUP BY sale_ts / 86400, item_id
+                """, params)
+                # Committed before the next batch's ATTACH, which a transaction would refuse
+                self.connection.commit()
+
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                if archives and catalogue != self._archive_catalogue():
+                    self.connection.rollback()
+                    continue
+                cursor.execute("DELETE FROM daily_item_sales")
+                cursor.execute("""
+                    INSERT INTO daily_item_sales (day, item_id, item_name, quantity, revenue)
+                    SELECT day, item_id, MAX(item_name), SUM(quantity), SUM(revenue)
+                    FROM (
+                        SELECT day, item_id, item_name, quantity, revenue FROM temp.archived_item_sales
+                        UNION ALL
+                        SELECT sale_ts / 86400, item_id, item_name, quantity, total_price FROM main.sales
+                        WHERE sale_ts IS NOT NULL AND item_id IS NOT NULL
+                    )
+                    GROUP BY day, item_id
+                """)
+                self.connection.commit()
+            except Exception:
+                self.connection.rollback()
+                raise
+            cursor.execute("DROP TABLE temp.archived_item_sales")
+            cursor.execute("SELECT COUNT(*) FROM daily_item_sales")
+            return cursor.fetchone()[0]
+
+    def _archive_catalogue(self):
+        """(year, max_sale_id) of every archived year: what archive rows readers may take."""
+        return self.connection.execute("SELECT year, max_sale_id FROM sales_archives ORDER BY year").fetchall()
+
+    def create_item_change_log(self):
+        """Record a monotonically increasing change_seq for every inserted, updated or deleted item.
+
+        Triggers keep item_changes current for every write path, including other
+        terminals sharing the file, so a view can ask for just the rows that
+        changed since the last sequence number it saw.
+        """
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS item_changes (
+                item_id INTEGER PRIMARY KEY,
+                change_seq INTEGER NOT NULL
+            )
+        """)
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_item_changes_seq ON item_changes(change_seq)")
+        # An upsert rather than INSERT OR REPLACE: a trigger's OR REPLACE is overridden
+        # by the conflict policy of the statement that fired it (e.g. an upsert on Items)
+        for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            self.cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_items_change_{event.lower()}
+                AFTER {event} ON Items
+                BEGIN
+                    INSERT INTO item_changes (item_id, change_seq)
+                    VALUES ({row}.item_id, (SELECT COALESCE(MAX(change_seq), 0) + 1 FROM item_changes))
+                    ON CONFLICT (item_id) DO UPDATE SET change_seq = excluded.change_seq;
+                END
+            """)
+        self.connection.commit()
+
+    def create_item_search_index(self):
+        """Create the name prefix index and the FTS5 index used by search_items.
+
+        The FTS5 table is an external-content index over Items, kept in sync by
+        triggers so add_item, update_item and delete_item need no extra work.
+        SQLite builds without FTS5 fall back to prefix search only.
+        """
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_name_nocase ON Items(name COLLATE NOCASE)")
+
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'items_fts'")
+        exists = self.cursor.fetchone() is not None
+        try:
+            self.cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+                    name, content='Items', content_rowid='item_id', prefix='2 3'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            print(f"Full-text search unavailable, using prefix search only: {e}")
+            self.connection.commit()
+            return
+
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_items_fts_insert AFTER INSERT ON Items
+            BEGIN
+                INSERT INTO items_fts (rowid, name) VALUES (NEW.item_id, NEW.name);
+            END
+        """)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_items_fts_delete AFTER DELETE ON Items
+            BEGIN
+                INSERT INTO items_fts (items_fts, rowid, name) VALUES ('delete', OLD.item_id, OLD.name);
+            END
+        """)
+        # Stock changes do not touch the index; only renames do
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_items_fts_update AFTER UPDATE OF name ON Items
+            BEGIN
+                INSERT INTO items_fts (items_fts, rowid, name) VALUES ('delete', OLD.item_id, OLD.name);
+                INSERT INTO items_fts (rowid, name) VALUES (NEW.item_id, NEW.name);
+            END
+        """)
+        if not exists:
+            self.cursor.execute("INSERT INTO items_fts (items_fts) VALUES ('rebuild')")
+        self.connection.commit()
+
+    def create_stock_reservations(self):
+        """Soft holds on stock for items sitting in a terminal's cart.
+
+        Reservations carry an expiry time and are ignored once it has passed,
+        so an abandoned cart never locks stock away for good.
+        """
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stock_reservations (
+                terminal_id TEXT NOT NULL,
+                item_id INTEGER NOT NULL,
+                quantity INTEGER NOT NULL CHECK(quantity > 0),
+                expires_at INTEGER NOT NULL,
+                PRIMARY KEY (terminal_id, item_id)
+            )
+        """)
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_stock_reservations_item ON stock_reservations(item_id, expires_at)"
+        )
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_stock_reservations_expiry ON stock_reservations(expires_at)"
+        )
+        self.connection.commit()
+
+    def create_low_stock_watchlist(self):
+        """Per-item reorder levels and the trigger-maintained low_stock watchlist.
+
+        An item is on the watchlist while its quantity is at or below its
+        reorder_level. Triggers on Items add and remove rows as stock moves,
+        so reading the watchlist never scans the catalogue.
+        """
+        columns = [row[1] for row in self.cursor.execute("PRAGMA table_info(Items)")]
+        if "reorder_level" not in columns:
+            self.cursor.execute(
+                "ALTER TABLE Items ADD COLUMN reorder_level INTEGER NOT NULL DEFAULT 0 CHECK(reorder_level >= 0)"
+            )
+
+        self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'low_stock'"
+        )
+        exists = self.cursor.fetchone() is not None
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS low_stock (
+                item_id INTEGER PRIMARY KEY,
+                quantity INTEGER NOT NULL,
+                reorder_level INTEGER NOT NULL,
+                flagged_at INTEGER NOT NULL
+            )
+        """)
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_low_stock_quantity ON low_stock(quantity, item_id)")
+
+        # Insert and update share one body: leave or join the watchlist, keeping flagged_at while on it
+        for event in ("INSERT", "UPDATE OF quantity, reorder_level"):
+            self.cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_items_low_stock_{event.split()[0].lower()}
+                AFTER {event} ON Items
+                BEGIN
+                    DELETE FROM low_stock WHERE item_id = NEW.item_id AND NEW.quantity > NEW.reorder_level;
+                    INSERT INTO low_stock (item_id, quantity, reorder_level, flagged_at)
+                    SELECT NEW.item_id, NEW.quantity, NEW.reorder_level, CAST(strftime('%s', 'now') AS INTEGER)
+                    WHERE NEW.quantity <= NEW.reorder_level
+                    ON CONFLICT (item_id) DO UPDATE SET
+                        quantity = excluded.quantity,
+                        reorder_level = excluded.reorder_level;
+                END
+            """)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_items_low_stock_delete
+            AFTER DELETE ON Items
+            BEGIN
+                DELETE FROM low_stock WHERE item_id = OLD.item_id;
+            END
+        """)
+
+        if not exists:
+            # One scan when the watchlist is first created; triggers take over from here
+            self.cursor.execute("""
+                INSERT INTO low_stock (item_id, quantity, reorder_level, flagged_at)
+                SELECT item_id, quantity, reorder_level, CAST(strftime('%s', 'now') AS INTEGER)
+                FROM Items WHERE quantity <= reorder_level
+            """)
+        self.connection.commit()
+
+    def add_item_barcodes(self):
+        """Add the optional, unique SKU/barcode column that scan-to-cart looks items up by."""
+        columns = [row[1] for row in self.cursor.execute("PRAGMA table_info(Items)")]
+        if "barcode" not in columns:
+            self.cursor.execute("ALTER TABLE Items ADD COLUMN barcode TEXT")
+        # Unique among items that have one; any number of items may have none (NULL)
+        self.cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_items_barcode ON Items(barcode)")
+        self.connection.commit()
+
+    def add_order_journal_ids(self):
+        """Add orders.journal_id, which makes replaying the sales journal idempotent."""
+        columns = [row[1] for row in self.cursor.execute("PRAGMA table_info(orders)")]
+        if "journal_id" not in columns:
+            self.cursor.execute("ALTER TABLE orders ADD COLUMN journal_id TEXT")
+        self.cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_orders_journal_id ON orders(journal_id)")
+        self.connection.commit()
+
+    def create_sales_archives(self):
+        """Catalogue of the closed years moved out to per-year archive files."""
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sales_archives (
+                year INTEGER PRIMARY KEY,
+                file_name TEXT NOT NULL,
+                first_ts INTEGER NOT NULL,
+                last_ts INTEGER NOT NULL,
+                sales INTEGER NOT NULL DEFAULT 0,
+                orders INTEGER NOT NULL DEFAULT 0,
+                archived_at TEXT
+            )
+        """)
+        self.connection.commit()
+
+    def create_order_history_indexes(self):
+        """Index orders by date and sales by order, for order history pages and single-order lookups."""
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_order_date ON orders(order_date)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_order_id ON sales(order_id)")
+        self.connection.commit()
+
+    def add_archive_watermarks(self):
+        """Record in sales_archives the highest sale_id and order_id readers may take from each archive.
+
+        Archive rows above the watermark were copied by an archiving run that
+        has not yet deleted them here, so they are still read from this database.
+        """
+        columns = [row[1] for row in self.cursor.execute("PRAGMA table_info(sales_archives)")]
+        for column in ("max_sale_id", "max_order_id"):
+            if column not in columns:
+                self.cursor.execute(f"ALTER TABLE sales_archives ADD COLUMN {column} INTEGER")
+        self.connection.commit()
+
+        # Existing archives: everything not also left in this database is already visible
+        for year, file_name, *_ in self.archived_years():
+            try:
+                schema, = self._attach_archives([(year, file_name)])
+            except FileNotFoundError:
+                continue  # Reading the year fails until the file is restored; nothing to measure
+            self.cursor.execute(f"""
+                UPDATE sales_archives SET
+                    max_sale_id = (SELECT MAX(sale_id) FROM {schema}.sales
+                                   WHERE sale_id NOT IN (SELECT sale_id FROM main.sales)),
+                    max_order_id = (SELECT MAX(order_id) FROM {schema}.orders
+                                    WHERE order_id NOT IN (SELECT order_id FROM main.orders))
+                WHERE year = ?
+            """, (year,))
+            self.connection.commit()
+            self._detach_archive(schema)
+
     def create_default_admin(self):
         self.cursor.execute("SELECT * FROM Users WHERE username = 'admin'")
         if not self.cursor.fetchone():  # If no admin found
@@ -69,46 +623,226 @@ class Database:
             self.connection.commit()
             print("Default Admin user created with username 'admin' and password 'password123'.")
 
+    @retry_on_busy
     def add_user(self, username, password, role):
         self.cursor.execute("INSERT INTO Users (username, password, role) VALUES (?, ?, ?)", (username, password, role))
         self.connection.commit()
 
+    def typed_cursor(self, model):
+        """A cursor on the shared connection whose rows come back as `model` objects."""
+        cursor = self.connection.cursor()
+        cursor.row_factory = model.from_row
+        return cursor
+
     def get_user(self, username):
-        self.cursor.execute("SELECT * FROM Users WHERE username = ?", (username,))
-        return self.cursor.fetchone()
+        """Return the User with this username, or None."""
+        cursor = self.typed_cursor(User)
+        cursor.execute(f"SELECT {USER_COLUMNS} FROM Users WHERE username = ?", (username,))
+        return cursor.fetchone()
 
-    def add_item(self, name, price, quantity):
-        self.cursor.execute("INSERT INTO Items (name, price, quantity) VALUES (?, ?, ?)", (name, price, quantity))
+    @retry_on_busy
+    def add_item(self, name, price, quantity, barcode=None):
+        self.cursor.execute(
+            "INSERT INTO Items (name, price, quantity, barcode) VALUES (?, ?, ?, ?)", (name, price, quantity, barcode)
+        )
         self.connection.commit()
 
+    @retry_on_busy
+    def upsert_items(self, items):
+        """Insert or update (name, price, quantity) rows in one transaction; returns the row count.
+
+        Existing items are matched by name and get the new price and quantity.
+        """
+        items = list(items)
+        try:
+            self.cursor.executemany("""
+                INSERT INTO Items (name, price, quantity) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET price = excluded.price, quantity = excluded.quantity
+            """, items)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        return len(items)
+
     def item_exists(self, name):
         """Check if an item with the given name already exists in the database."""
         self.cursor.execute("SELECT 1 FROM Items WHERE name = ?", (name,))
         return self.cursor.fetchone() is not None
 
+    @retry_on_busy
     def update_item_quantity(self, item_id, quantity):
         self.cursor.execute("UPDATE Items SET quantity = ? WHERE item_id = ?", (quantity, item_id))
         self.connection.commit()
 
+    @retry_on_busy
     def delete_item(self, item_id):
         self.cursor.execute("DELETE FROM Items WHERE item_id = ?", (item_id,))
         self.connection.commit()
 
-    def update_item(self, item_id, name, price, quantity):
-        self.cursor.execute(
-            "UPDATE Items SET name = ?, price = ?, quantity = ? WHERE item_id = ?",
-            (name, price, quantity, item_id)
-        )
-        self.connection.commit()
+    @retry_on_busy
+    def update_item(self, item_id, name, price, quantity, reorder_level=None, barcode=None):
+        """Save an item's edited fields in one UPDATE, so the edit lands whole or not at all.
+
+        reorder_level and barcode are left as they are when None; barcode=""
+        clears the barcode. Raises sqlite3.IntegrityError, changing nothing,
+        if another item has the barcode.
+        """
+        assignments = ["name = ?", "price = ?", "quantity = ?"]
+        params = [name, price, quantity]
+        if reorder_level is not None:
+            assignments.append("reorder_level = ?")
+            params.append(reorder_level)
+        if barcode is not None:
+            assignments.append("barcode = ?")
+            params.append(barcode or None)
+        try:
+            self.cursor.execute(f"UPDATE Items SET {', '.join(assignments)} WHERE item_id = ?", params + [item_id])
+            self.connection.commit()
+        except sqlite3.Error:
+            self.connection.rollback()
+            raise
+
+    def fetch_low_stock(self, limit=LOW_STOCK_LIMIT):
+        """Items on the low-stock watchlist, lowest stock first.
+
+        Reads the trigger-maintained low_stock table through its quantity index
+        and joins Items by primary key; the catalogue itself is never scanned.
+        """
+        cursor = self.typed_cursor(Item)
+        cursor.execute(f"""
+            SELECT {ITEM_COLUMNS} FROM low_stock
+            JOIN Items ON Items.item_id = low_stock.item_id
+            ORDER BY low_stock.quantity, low_stock.item_id
+            LIMIT ?
+        """, (limit,))
+        return cursor.fetchall()
 
     def fetch_item(self, item_id):
-        self.cursor.execute("SELECT * FROM Items WHERE item_id = ?", (item_id,))
-        return self.cursor.fetchone()
+        """Return the Item with this id, or None."""
+        cursor = self.typed_cursor(Item)
+        cursor.execute(f"SELECT {ITEM_COLUMNS} FROM Items WHERE item_id = ?", (item_id,))
+        return cursor.fetchone()
 
+    def fetch_item_by_barcode(self, barcode):
+        """Return the Item with this SKU/barcode, or None (a seek on idx_items_barcode)."""
+        cursor = self.typed_cursor(Item)
+        cursor.execute(f"SELECT {ITEM_COLUMNS} FROM Items WHERE barcode = ?", (barcode,))
+        return cursor.fetchone()
+
+    @retry_on_busy
     def fetch_all_items(self):
-        self.cursor.execute("SELECT * FROM Items")
-        return self.cursor.fetchall()
+        """Return every Item as a list; prefer iter_items for large catalogues."""
+        cursor = self.typed_cursor(Item)
+        cursor.execute(f"SELECT {ITEM_COLUMNS} FROM Items")
+        return cursor.fetchall()
+
+    def iter_items(self, batch_size=FETCH_BATCH_SIZE):
+        """Yield every Item in item_id order without holding the whole table in memory."""
+        cursor = self.typed_cursor(Item)
+        cursor.execute(f"SELECT {ITEM_COLUMNS} FROM Items ORDER BY item_id")
+        return iterate_rows(cursor, batch_size)
+
+    def fetch_items_page(self, after_id=None, limit=ITEMS_PAGE_SIZE):
+        """Fetch the next `limit` items ordered by item_id, starting after `after_id`.
+
+        Keyset pagination: each page is a primary-key range seek, so the cost
+        does not grow with how far into the catalogue the user has scrolled.
+        """
+        cursor = self.typed_cursor(Item)
+        cursor.execute(
+            f"SELECT {ITEM_COLUMNS} FROM Items WHERE item_id > ? ORDER BY item_id LIMIT ?",
+            (after_id if after_id is not None else -1, limit)
+        )
+        return cursor.fetchall()
+
+    def fetch_items_page_before(self, before_id, limit=ITEMS_PAGE_SIZE):
+        """Fetch the `limit` items just before `before_id`, in item_id order.
+
+        The same primary-key seek as fetch_items_page, read backwards, for
+        reloading rows above the table's window when the user scrolls back up.
+        """
+        cursor = self.typed_cursor(Item)
+        cursor.execute(
+            f"SELECT {ITEM_COLUMNS} FROM Items WHERE item_id < ? ORDER BY item_id DESC LIMIT ?",
+            (before_id, limit)
+        )
+        return cursor.fetchall()[::-1]
+
+    def find_items_by_prefix(self, prefix, limit=SEARCH_LIMIT):
+        """Items whose name starts with `prefix` (case-insensitive), via idx_items_name_nocase."""
+        prefix = prefix.lower()
+        if not prefix:
+            return []
+        # [prefix, prefix-with-last-char-bumped) is the index range holding every match
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        cursor = self.typed_cursor(Item)
+        cursor.execute(f"""
+            SELECT {ITEM_COLUMNS} FROM Items
+            WHERE name >= ? COLLATE NOCASE AND name < ? COLLATE NOCASE
+            ORDER BY name COLLATE NOCASE
+            LIMIT ?
+        """, (prefix, upper, limit))
+        return cursor.fetchall()
+
+    def search_items(self, query, limit=SEARCH_LIMIT):
+        """Ranked item search: name-prefix matches first, then FTS5 matches by bm25 rank."""
+        results = self.find_items_by_prefix(query.strip(), limit)
+        tokens = re.findall(r"\w+", query)
+        if len(results) >= limit or not tokens:
+            return results
+
+        # Every word must match the start of some word in the name
+        match = " ".join(f'"{token}"*' for token in tokens)
+        seen = {item.item_id for item in results}
+        cursor = self.typed_cursor(Item)
+        try:
+            cursor.execute(f"""
+                SELECT {ITEM_COLUMNS} FROM items_fts
+                JOIN Items ON Items.item_id = items_fts.rowid
+                WHERE items_fts MATCH ?
+                ORDER BY items_fts.rank
+                LIMIT ?
+            """, (match, limit))
+        except sqlite3.OperationalError:
+            # No FTS5 in this SQLite build
+            return results
+
+        for item in cursor.fetchall():
+            if item.item_id not in seen and len(results) < limit:
+                results.append(item)
+        return results
+
+    def latest_item_change(self):
+        """Return the newest change_seq in the item change log (0 if none)."""
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT COALESCE(MAX(change_seq), 0) FROM item_changes")
+        return cursor.fetchone()[0]
+
+    def fetch_item_changes(self, since_seq, limit=ITEM_CHANGES_LIMIT):
+        """Return (latest_seq, changes) for at most `limit` item changes after `since_seq`.
 
+        `changes` is a list of (item_id, item) in change order, where item is the
+        current Item, or None if the item has been deleted. latest_seq is the
+        last change returned, so a full batch is followed by calling again from it.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute(f"""
+            SELECT c.change_seq, c.item_id, {ITEM_COLUMNS}
+            FROM item_changes c
+            LEFT JOIN Items ON Items.item_id = c.item_id
+            WHERE c.change_seq > ?
+            ORDER BY c.change_seq
+            LIMIT ?
+        """, (since_seq, limit))
+        changes = []
+        latest_seq = since_seq
+        for row in cursor.fetchall():
+            latest_seq = row[0]
+            changes.append((row[1], Item.from_row(cursor, row[2:]) if row[2] is not None else None))
+        return latest_seq, changes
+
+    @retry_on_busy
     def add_order(self, order_total, total_items):
         """Add a new order record to the orders table."""
         cursor = self.connection.cursor()
@@ -120,33 +854,757 @@ class Database:
         self.connection.commit()
         return cursor.lastrowid  # Return the new order ID
 
+    @retry_on_busy
     def add_sale(self, order_id, item_id, item_name, unit_price, quantity):
         """Add a new sale record to the sales table."""
         cursor = self.connection.cursor()
         total_price = unit_price * quantity
-        sale_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')  # Current date and time
+        now = datetime.now().replace(microsecond=0)
+        sale_date = now.strftime('%Y-%m-%d %H:%M:%S')  # Current date and time
         cursor.execute("""
-            INSERT INTO sales (order_id, item_id, item_name, unit_price, quantity, total_price, sale_date)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (order_id, item_id, item_name, unit_price, quantity, total_price, sale_date))
+            INSERT INTO sales (order_id, item_id, item_name, unit_price, quantity, total_price, sale_date, sale_ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (order_id, item_id, item_name, unit_price, quantity, total_price, sale_date, to_timestamp(now)))
         self.connection.commit()
 
+    @retry_on_busy
     def update_item_stock(self, item_id, quantity_change):
-        """Update the stock quantity of an item."""
+        """Update the stock quantity of an item.
+
+        Decrements are guarded so concurrent terminals can never drive stock
+        negative; returns False (and changes nothing) if there is not enough.
+        """
         cursor = self.connection.cursor()
-        cursor.execute("UPDATE items SET quantity = quantity + ? WHERE item_id = ?", (quantity_change, item_id))
+        cursor.execute(
+            "UPDATE items SET quantity = quantity + ? WHERE item_id = ? AND quantity + ? >= 0",
+            (quantity_change, item_id, quantity_change)
+        )
         self.connection.commit()
+        return cursor.rowcount > 0
 
-    def get_sales_between_dates(self, start_date, end_date):
-        """Retrieve sales data between two dates (inclusive)."""
+    def _reserved_by_others(self, cursor, item_id, terminal_id, now):
+        cursor.execute("""
+            SELECT COALESCE(SUM(quantity), 0) FROM stock_reservations
+            WHERE item_id = ? AND terminal_id != ? AND expires_at > ?
+        """, (item_id, terminal_id, now))
+        return cursor.fetchone()[0]
+
+    @retry_on_busy
+    def reserve_stock(self, item_id, quantity, terminal_id=TERMINAL_ID, ttl=RESERVATION_TTL, in_cart=0):
+        """Add `quantity` to this terminal's soft hold on an item.
+
+        Checks against fresh stock minus other terminals' live reservations, not
+        against whatever the screen last showed. `in_cart` is what the cart
+        already holds, so a hold that lapsed while the cart sat idle is counted
+        again. Returns (ok, available) where available is what this terminal may
+        hold in total.
+        """
+        now = int(clock.time())
+        cursor = self.connection.cursor()
+        try:
+            # Take the write lock up front so the check and the hold are atomic
+            if not self.connection.in_transaction:
+                cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("DELETE FROM stock_reservations WHERE expires_at <= ?", (now,))
+
+            cursor.execute("SELECT quantity FROM Items WHERE item_id = ?", (item_id,))
+            row = cursor.fetchone()
+            available = (row[0] if row else 0) - self._reserved_by_others(cursor, item_id, terminal_id, now)
+
+            cursor.execute(
+                "SELECT quantity FROM stock_reservations WHERE terminal_id = ? AND item_id = ?",
+                (terminal_id, item_id)
+            )
+            row = cursor.fetchone()
+            held = max(row[0] if row else 0, in_cart)
+            if held + quantity > available:
+                self.connection.rollback()
+                return False, available
+
+            cursor.execute("""
+                INSERT INTO stock_reservations (terminal_id, item_id, quantity, expires_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (terminal_id, item_id) DO UPDATE SET quantity = excluded.quantity
+            """, (terminal_id, item_id, held + quantity, now + ttl))
+            # Any activity keeps the whole cart alive; rows already renewed this second are left alone
+            cursor.execute(
+                "UPDATE stock_reservations SET expires_at = ? WHERE terminal_id = ? AND expires_at != ?",
+                (now + ttl, terminal_id, now + ttl)
+            )
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        return True, available
+
+    @retry_on_busy
+    def release_reservations(self, terminal_id=TERMINAL_ID, item_id=None):
+        """Drop this terminal's holds, for one item or the whole cart."""
+        if item_id is None:
+            self.cursor.execute("DELETE FROM stock_reservations WHERE terminal_id = ?", (terminal_id,))
+        else:
+            self.cursor.execute(
+                "DELETE FROM stock_reservations WHERE terminal_id = ? AND item_id = ?",
+                (terminal_id, item_id)
+            )
+        self.connection.commit()
+
+    def abandoned_terminals(self):
+        """Fallback terminal ids of this host (<host name>:<pid>) with holds but no running till.
+
+        Such an id is never claimed again, so its holds would otherwise only
+        go when they expire.
+        """
+        prefix = f"{socket.gethostname()}:"
         cursor = self.connection.cursor()
+        cursor.execute(
+            "SELECT DISTINCT terminal_id FROM stock_reservations WHERE substr(terminal_id, 1, ?) = ?",
+            (len(prefix), prefix)
+        )
+        return [row[0] for row in cursor.fetchall() if not is_locked(terminal_lock_path(row[0]))]
+
+    @retry_on_busy
+    def place_order(self, cart, terminal_id=TERMINAL_ID):
+        """Write an order, its sale lines and the stock decrements in one transaction.
+
+        `cart` is an iterable of (item_id, item_name, unit_price, quantity) lines.
+        Returns (order_id, shortages). If any line is short on stock nothing is
+        written, order_id is None and shortages lists every offending line as
+        (item_id, item_name, requested, available).
+
+        Stock held in other terminals' carts is treated as unavailable, and this
+        terminal's own reservations are consumed by the order.
+        """
+        lines = list(cart)
+        cursor = self.connection.cursor()
+        now = datetime.now().replace(microsecond=0)
+        order_date = now.strftime('%Y-%m-%d %H:%M:%S')
+        sale_ts = to_timestamp(now)
+        wall_clock = int(clock.time())
+
+        # The same item can appear on several lines; check stock against the sum
+        requested = {}
+        for item_id, item_name, unit_price, quantity in lines:
+            requested[item_id] = requested.get(item_id, 0) + quantity
+
+        try:
+            # Take the write lock before reading stock so terminals queue instead of deadlocking
+            if not self.connection.in_transaction:
+                cursor.execute("BEGIN IMMEDIATE")
+
+            # Conditional decrements: a row is only touched if enough unreserved stock is left
+            shortages = []
+            for item_id, quantity in requested.items():
+                cursor.execute("""
+                    UPDATE Items SET quantity = quantity - ?
+                    WHERE item_id = ? AND quantity - ? >= (
+                        SELECT COALESCE(SUM(quantity), 0) FROM stock_reservations
+                        WHERE item_id = ? AND terminal_id != ? AND expires_at > ?
+                    )
+                """, (quantity, item_id, quantity, item_id, terminal_id, wall_clock))
+                if cursor.rowcount == 0:
+                    cursor.execute("SELECT name, quantity FROM Items WHERE item_id = ?", (item_id,))
+                    row = cursor.fetchone()
+                    name, available = row if row else (None, 0)
+                    if row:
+                        available -= self._reserved_by_others(cursor, item_id, terminal_id, wall_clock)
+                    shortages.append((item_id, name, quantity, max(available, 0)))
+
+            if shortages:
+                self.connection.rollback()
+                return None, shortages
+
+            order_id = self._insert_order(cursor, lines, order_date, sale_ts)
+
+            # The cart's holds have become real stock decrements
+            cursor.executemany(
+                "DELETE FROM stock_reservations WHERE terminal_id = ? AND item_id = ?",
+                [(terminal_id, item_id) for item_id in requested]
+            )
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+
+        return order_id, []
+
+    def _insert_order(self, cursor, lines, order_date, sale_ts, journal_id=None):
+        """Insert an order header and its sale lines inside the caller's transaction; returns order_id."""
+        order_total = round(sum(unit_price * quantity for _, _, unit_price, quantity in lines), 2)
+        total_items = sum(quantity for _, _, _, quantity in lines)
         cursor.execute("""
-            SELECT * FROM sales
-            WHERE sale_date BETWEEN ? AND ?
-            ORDER BY sale_date ASC
-        """, (start_date.strftime("%Y-%m-%d 00:00:00"), end_date.strftime("%Y-%m-%d 23:59:59")))
+            INSERT INTO orders (order_total, total_items, order_date, journal_id)
+            VALUES (?, ?, ?, ?)
+        """, (order_total, total_items, order_date, journal_id))
+        order_id = cursor.lastrowid
+
+        cursor.executemany("""
+            INSERT INTO sales (order_id, item_id, item_name, unit_price, quantity, total_price, sale_date, sale_ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (order_id, item_id, item_name, unit_price, quantity, round(unit_price * quantity, 2), order_date, sale_ts)
+            for item_id, item_name, unit_price, quantity in lines
+        ])
+        return order_id
+
+    def terminal_reservations(self, item_ids, terminal_id=TERMINAL_ID):
+        """{item_id: quantity} of a terminal's live stock reservations on the given items."""
+        item_ids = list(item_ids)
+        placeholders = ", ".join("?" * len(item_ids))
+        cursor = self.connection.cursor()
+        cursor.execute(f"""
+            SELECT item_id, quantity FROM stock_reservations
+            WHERE terminal_id = ? AND expires_at > ? AND item_id IN ({placeholders})
+        """, [terminal_id, int(clock.time())] + item_ids)
+        return dict(cursor.fetchall())
+
+    @retry_on_busy
+    def apply_journaled_orders(self, records):
+        """Write a batch of sales-journal records in one transaction; returns how many were new.
+
+        Each record is a dict with journal_id, terminal_id, order_date, sale_ts
+        and lines of [item_id, item_name, unit_price, quantity]. Records whose
+        journal_id is already in orders are skipped, so a replay after a crash
+        never writes an order twice. The stock was held by the terminal's
+        reservations when the order was journaled; it is now decremented and
+        the matching part of those reservations released. Stock cannot go
+        below zero, so if it was edited down meanwhile the order is an
+        oversell: stock is set to 0 and the shortfall is reported.
+        """
+        cursor = self.connection.cursor()
+        applied = 0
+        try:
+            if not self.connection.in_transaction:
+                cursor.execute("BEGIN IMMEDIATE")
+            for record in records:
+                cursor.execute("SELECT 1 FROM orders WHERE journal_id = ?", (record["journal_id"],))
+                if cursor.fetchone():
+                    continue
+
+                lines = [tuple(line) for line in record["lines"]]
+                self._insert_order(cursor, lines, record["order_date"], record["sale_ts"], record["journal_id"])
+
+                requested = {}
+                for item_id, item_name, unit_price, quantity in lines:
+                    requested[item_id] = requested.get(item_id, 0) + quantity
+                terminal_id = record["terminal_id"]
+                for item_id, quantity in requested.items():
+                    # The goods have left the shop, so the sale is recorded even if stock was edited meanwhile
+                    cursor.execute("SELECT name, quantity FROM Items WHERE item_id = ?", (item_id,))
+                    row = cursor.fetchone()
+                    if row is not None and row[1] < quantity:
+                        print(f"Sales journal: order {record['journal_id']} oversold '{row[0]}' "
+                              f"by {quantity - row[1]} (sold {quantity}, {row[1]} in stock); stock set to 0.")
+                    cursor.execute(
+                        "UPDATE Items SET quantity = MAX(quantity - ?, 0) WHERE item_id = ?", (quantity, item_id)
+                    )
+                    cursor.execute(
+                        "DELETE FROM stock_reservations WHERE terminal_id = ? AND item_id = ? AND quantity <= ?",
+                        (terminal_id, item_id, quantity)
+                    )
+                    cursor.execute(
+                        "UPDATE stock_reservations SET quantity = quantity - ? WHERE terminal_id = ? AND item_id = ?",
+                        (quantity, terminal_id, item_id)
+                    )
+                applied += 1
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        return applied
+
+    def get_sales_between_dates(self, start_date, end_date):
+        """Retrieve the Sales between two dates (inclusive)."""
+        return list(self._sales_between_dates(start_date, end_date, FETCH_BATCH_SIZE))
+
+    def iter_sales_between_dates(self, start_date, end_date, batch_size=FETCH_BATCH_SIZE):
+        """Yield the Sales between two dates (inclusive) without building a list."""
+        return self._sales_between_dates(start_date, end_date, batch_size)
+
+    def iter_orders_between_dates(self, start_date, end_date, batch_size=FETCH_BATCH_SIZE):
+        """Yield the Orders placed between two dates (inclusive), oldest first.
+
+        Ordered by (order_date, order_id), the order idx_orders_order_date already
+        returns them in, so rows stream straight off the index with no sort.
+        """
+        for window_start, window_end, archives in self._archive_windows(*day_bounds(start_date, end_date)):
+            query, params = self._union_partitions(f"""
+                SELECT {ORDER_COLUMNS} FROM {{schema}}.orders
+                WHERE order_date BETWEEN ? AND ? {{orders_visible}}
+            """, (timestamp_text(window_start), timestamp_text(window_end)), self._attach_archives(archives))
+            cursor = self.typed_cursor(Order)
+            cursor.execute(f"{query} ORDER BY order_date, order_id", params)
+            yield from iterate_rows(cursor, batch_size)
+
+    def fetch_orders_page(self, before=None, limit=ORDERS_PAGE_SIZE, start_date=None, end_date=None):
+        """Fetch the next `limit` Orders, newest first, after the (order_date, order_id) `before`.
+
+        Keyset pagination on idx_orders_order_date: pass the order_date and
+        order_id of the last order shown to get the page that follows it, so
+        every page is an index seek however far back the user has gone.
+        start_date/end_date optionally limit the pages to whole days; archived
+        years in that range are read as well, one partition at a time from the
+        newest, stopping as soon as the page is full. Partitions entirely newer
+        than `before` are never opened.
+        """
+        start = datetime.combine(start_date.date(), time.min) if start_date else datetime(1970, 1, 1)
+        end = datetime.combine(end_date.date(), time(23, 59, 59)) if end_date else datetime(9999, 12, 31, 23, 59, 59)
+        conditions = ["order_date BETWEEN ? AND ?"]
+        keyset = []
+        if before is not None:
+            # The date bound is what the index seeks on; the row value breaks ties within a second
+            end = min(end, datetime.strptime(before[0], '%Y-%m-%d %H:%M:%S'))
+            conditions.append("(order_date, order_id) < (?, ?)")
+            keyset = list(before)
+
+        orders = []
+        windows = self._archive_windows(to_timestamp(start), to_timestamp(end), per_window=1, newest_first=True)
+        for window_start, window_end, archives in windows:
+            query, params = self._union_partitions(f"""
+                SELECT {ORDER_COLUMNS} FROM {{schema}}.orders
+                WHERE {" AND ".join(conditions)} {{orders_visible}}
+            """, [timestamp_text(window_start), timestamp_text(window_end)] + keyset,
+                self._attach_archives(archives))
+            cursor = self.typed_cursor(Order)
+            cursor.execute(f"{query} ORDER BY order_date DESC, order_id DESC LIMIT ?", params + (limit - len(orders),))
+            orders += cursor.fetchall()
+            if len(orders) >= limit:
+                break
+        return orders
+
+    def fetch_order(self, order_id):
+        """Return (Order, [Sale, ...]) for one order, or None if there is no such order.
+
+        The header and its lines come back from one query: a primary-key seek
+        on orders joined to sales through idx_sales_order_id. An order that has
+        been archived is looked up in the archive files, newest year first.
+        """
+        query = f"""
+            SELECT {ORDER_COLUMNS}, {SALE_COLUMNS}
+            FROM {{schema}}.orders LEFT JOIN {{schema}}.sales ON sales.order_id = orders.order_id
+            WHERE orders.order_id = ?
+            ORDER BY sales.sale_id
+        """
+        cursor = self.connection.cursor()
+        rows = cursor.execute(query.format(schema="main"), (order_id,)).fetchall()
+        if not rows:
+            for year, file_name, *_ in reversed(self.archived_years()):
+                schema, = self._attach_archives([(year, file_name)])
+                rows = cursor.execute(query.format(schema=schema), (order_id,)).fetchall()
+                if rows:
+                    break
+            else:
+                return None
+
+        split = len(Order.COLUMNS)
+        order = Order.from_row(cursor, rows[0][:split])
+        lines = [Sale.from_row(cursor, row[split:]) for row in rows if row[split] is not None]
+        return order, lines
+
+    def _sales_between_dates(self, start_date, end_date, batch_size):
+        for window_start, window_end, archives in self._archive_windows(*day_bounds(start_date, end_date)):
+            # Range scan on idx_sales_sale_ts in each partition; cost follows the rows returned
+            query, params = self._union_partitions(f"""
+                SELECT {SALE_COLUMNS} FROM {{schema}}.sales
+                WHERE sale_ts BETWEEN ? AND ? {{sales_visible}}
+            """, (window_start, window_end), self._attach_archives(archives))
+            cursor = self.typed_cursor(Sale)
+            cursor.execute(f"{query} ORDER BY sale_ts ASC", params)
+            yield from iterate_rows(cursor, batch_size)
+
+    def _union_partitions(self, select, params, schemas, main=True):
+        """`select` over this database and the attached archive `schemas`, as one UNION ALL.
+
+        `select` names its tables as {schema}.table and is repeated once per
+        partition with the same params. Its WHERE clause must end in
+        {sales_visible} or {orders_visible}: for an archive these keep rows
+        above the year's watermark out (they are still read from this database
+        until the archiving run deletes them here), and for this database they
+        are empty. main=False reads the archives alone. Returns (query, params).
+        """
+        parts = [select.format(schema="main", sales_visible="", orders_visible="")] if main else []
+        for schema in schemas:
+            # Read in the same statement as this database's rows, so both come from one snapshot
+            watermark = f"(SELECT {{}} FROM main.sales_archives WHERE year = {int(schema[len('archive_'):])})"
+            parts.append(select.format(
+                schema=schema,
+                sales_visible=f"AND +sales.sale_id <= {watermark.format('max_sale_id')}",
+                orders_visible=f"AND +orders.order_id <= {watermark.format('max_order_id')}"
+            ))
+        query = "\nUNION ALL\n".join(parts)
+        return query, tuple(params) * len(parts)
+
+    def _archive_windows(self, start_ts, end_ts, per_window=None, newest_first=False):
+        """Yield (window_start, window_end, [(year, file_name), ...]) windows covering start_ts..end_ts, oldest first.
+
+        Windows end at archived-year boundaries and hold at most `per_window`
+        archives, by default as many as SQLite can attach at once, so reading
+        one window at a time never runs into the attach limit. The catalogue is
+        read again for each window, so a year archived while earlier windows
+        were being read is still found. Time after the newest archived year is
+        a window with no archives. newest_first=True walks the range backwards,
+        starting with that window.
+        """
+        per_window = per_window or self.connection.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        cursor = self.connection.cursor()
+        if newest_first:
+            window_end = end_ts
+            while window_end >= start_ts:
+                cursor.execute(
+                    "SELECT year, file_name FROM sales_archives WHERE last_ts >= ? AND first_ts <= ?"
+                    " ORDER BY year DESC LIMIT ?",
+                    (start_ts, window_end, per_window + 1)
+                )
+                archives = cursor.fetchall()
+                if not archives:
+                    yield start_ts, window_end, []
+                    return
+                newest_end = year_bounds(archives[0][0])[1]
+                if newest_end < window_end:
+                    yield newest_end + 1, window_end, []
+                    window_end = newest_end
+                    continue
+                batch = archives[:per_window]
+                if len(archives) > per_window:
+                    window_start = year_bounds(archives[per_window][0])[1] + 1
+                else:
+                    window_start = max(start_ts, year_bounds(batch[-1][0])[0])
+                yield window_start, window_end, batch
+                window_end = window_start - 1
+            return
+
+        window_start = start_ts
+        while window_start <= end_ts:
+            cursor.execute(
+                "SELECT year, file_name FROM sales_archives WHERE last_ts >= ? AND first_ts <= ? ORDER BY year LIMIT ?",
+                (window_start, end_ts, per_window + 1)
+            )
+            archives = cursor.fetchall()
+            batch = archives[:per_window]
+            if len(archives) > per_window:
+                window_end = year_bounds(archives[per_window][0])[0] - 1
+            elif batch:
+                window_end = min(end_ts, year_bounds(batch[-1][0])[1])
+            else:
+                window_end = end_ts
+            yield window_start, window_end, batch
+            window_start = window_end + 1
+
+    def _attach_archives(self, archives, create=False):
+        """ATTACH the [(year, file_name), ...] archives; returns their schema names in the same order.
+
+        Attachments stay on the shared connection for later queries. When the
+        attach limit would be exceeded, archives not in `archives` are detached
+        first. create=True lets an archive file that does not exist yet be created.
+        """
+        if not archives:
+            return []
+        limit = self.connection.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        if len(archives) > limit:
+            raise ValueError(f"{len(archives)} archives requested; at most {limit} can be attached at once")
+
+        cursor = self.connection.cursor()
+        wanted = [f"archive_{year}" for year, _ in archives]
+        attached = [row[1] for row in cursor.execute("PRAGMA database_list") if row[1].startswith("archive_")]
+        missing = [(year, file_name) for year, file_name in archives if f"archive_{year}" not in attached]
+        for schema in [schema for schema in attached if schema not in wanted]:
+            if len(attached) + len(missing) <= limit:
+                break
+            if self._detach_archive(schema):
+                attached.remove(schema)
+        for year, file_name in missing:
+            path = self.archive_path(file_name)
+            if not create and not os.path.exists(path):
+                raise FileNotFoundError(f"The sales archive for {year} is missing: {path}")
+            cursor.execute(f"ATTACH DATABASE ? AS archive_{year}", (path,))
+        return wanted
+
+    def _detach_archive(self, schema):
+        """DETACH an attached archive; returns False if an open iterator is still reading it."""
+        try:
+            self.connection.execute(f"DETACH DATABASE {schema}")
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def archive_path(self, file_name):
+        """Archives live in the same folder as the database they were moved out of."""
+        return os.path.join(os.path.dirname(os.path.abspath(self.db_name)), file_name)
+
+    def iter_daily_item_quantities(self, start_date, end_date, batch_size=FETCH_BATCH_SIZE):
+        """Yield (day, item_id, quantity) rollup rows for whole days start_date..end_date.
+
+        day is the day number (sale_ts // 86400); days with no sales of an item have no row.
+        """
+        start_ts, end_ts = day_bounds(start_date, end_date)
+        cursor = self.connection.cursor()
+        cursor.execute(
+            "SELECT day, item_id, quantity FROM daily_item_sales WHERE day BETWEEN ? AND ?",
+            (start_ts // SECONDS_PER_DAY, end_ts // SECONDS_PER_DAY)
+        )
+        return iterate_rows(cursor, batch_size)
+
+    def sales_high_water_mark(self):
+        """The newest sale_id (0 if there are no sales); grows whenever a sale is recorded."""
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT COALESCE(MAX(sale_id), 0) FROM sales")
+        return cursor.fetchone()[0]
+
+    def sales_added_between(self, since_sale_id, start_date, end_date):
+        """True if any sale after `since_sale_id` falls in whole days start_date..end_date.
+
+        Only the sales recorded since the mark are scanned (a rowid range).
+        The unary + keeps SQLite off idx_sales_sale_ts, whose cost would grow
+        with the size of the report range rather than with the new sales.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute(
+            "SELECT 1 FROM sales WHERE sale_id > ? AND +sale_ts BETWEEN ? AND ? LIMIT 1",
+            (since_sale_id,) + day_bounds(start_date, end_date)
+        )
+        return cursor.fetchone() is not None
+
+    def aggregate_sales(self, start_date, end_date, group_by="item", order_by="quantity", limit=None, offset=0,
+                        with_summary=True):
+        """Grouped sales totals for whole days start_date..end_date, computed in SQLite.
+
+        Item and day groupings read the daily_item_sales rollup, which keeps
+        archived years; grouping by order falls back to the raw sales lines,
+        including any archived years the range touches. With `limit`, only that many
+        groups starting at `offset` are returned (top-N and paging).
+        with_summary=False skips the range totals and top seller, which do not
+        change from page to page; they come back as None.
+
+        Returns a dict with:
+          rows           -- [(group_key, quantity, revenue), ...] sorted by order_by
+          has_more       -- True if groups beyond this page exist
+          total_quantity -- units sold in the range (all groups, ignoring limit)
+          total_revenue  -- revenue in the range (all groups, ignoring limit)
+          top_seller     -- the (group_key, quantity, revenue) row with the most units, or None
+        """
+        if group_by not in SALES_GROUPS:
+            raise ValueError(f"Unknown group_by '{group_by}'")
+        if order_by not in SALES_ORDERS:
+            raise ValueError(f"Unknown order_by '{order_by}'")
+
+        start_ts, end_ts = day_bounds(start_date, end_date)
+        if group_by in ROLLUP_GROUPS:
+            # Whole-day ranges are answered from the rollup: one row per item per day
+            group_key = ROLLUP_GROUPS[group_by]
+            source, range_column, revenue_column = "daily_item_sales", "day", "revenue"
+            bounds = (start_ts // SECONDS_PER_DAY, end_ts // SECONDS_PER_DAY)
+            source_params = ()
+        else:
+            # Raw lines of the hot table plus the archived years the range touches
+            group_key = SALES_GROUPS[group_by]
+            range_column, revenue_column = "sale_ts", "total_price"
+            bounds = (start_ts, end_ts)
+            select = f"SELECT {ARCHIVE_SALE_COLUMNS} FROM {{schema}}.sales WHERE sale_ts BETWEEN ? AND ? {{sales_visible}}"
+            windows = list(self._archive_windows(start_ts, end_ts))
+            if len(windows) == 1 or not windows[1][2]:
+                # Every archive the range touches fits in the first window: one statement over the whole range
+                source, source_params = self._union_partitions(select, bounds, self._attach_archives(windows[0][2]))
+                source = f"({source})"
+            else:
+                # More archived years than can be attached at once: total each batch, then rank the totals
+                source, source_params = self._stage_group_totals(select, group_key, windows), ()
+                group_key = "group_key"
+        bounds = source_params + bounds
+
+        grouped = f"""
+            SELECT {group_key} AS group_key, SUM(quantity) AS quantity, SUM({revenue_column}) AS revenue
+            FROM {source}
+            WHERE {range_column} BETWEEN ? AND ?
+            GROUP BY group_key
+        """
+        cursor = self.connection.cursor()
+
+        query = f"{grouped} ORDER BY {SALES_ORDERS[order_by]}"
+        params = bounds
+        if limit is not None:
+            # One extra row tells whether another page follows
+            query += " LIMIT ? OFFSET ?"
+            params = bounds + (limit + 1, offset)
+        rows = cursor.execute(query, params).fetchall()
+        has_more = limit is not None and len(rows) > limit
+        if has_more:
+            rows = rows[:limit]
+
+        total_quantity = total_revenue = top_seller = None
+        if with_summary:
+            if rows and order_by == "quantity" and not offset:
+                top_seller = rows[0]
+            else:
+                cursor.execute(f"{grouped} ORDER BY {SALES_ORDERS['quantity']} LIMIT 1", bounds)
+                top_seller = cursor.fetchone()
+
+            cursor.execute(f"""
+                SELECT COALESCE(SUM(quantity), 0), COALESCE(SUM({revenue_column}), 0)
+                FROM {source}
+                WHERE {range_column} BETWEEN ? AND ?
+            """, bounds)
+            total_quantity, total_revenue = cursor.fetchone()
+
+        return {
+            "rows": rows,
+            "has_more": has_more,
+            "total_quantity": total_quantity,
+            "total_revenue": total_revenue,
+            "top_seller": top_seller,
+        }
+
+    def _stage_group_totals(self, select, group_key, windows):
+        """Sum the sales lines of each window by group_key into a temp table; returns its name.
+
+        Each window is read in one statement with its own archives attached,
+        so a year's rows are counted once however they are split between this
+        database and its archive. The table has the columns aggregate_sales reads from raw
+        lines (group_key, quantity, total_price, sale_ts) and is replaced on
+        every call.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("DROP TABLE IF EXISTS temp.sales_group_totals")
+        cursor.execute("CREATE TEMP TABLE sales_group_totals (group_key, quantity, total_price, sale_ts)")
+        self.connection.commit()
+        for window_start, window_end, archives in windows:
+            sales, params = self._union_partitions(select, (window_start, window_end), self._attach_archives(archives))
+            cursor.execute(f"""
+                INSERT INTO temp.sales_group_totals
+                SELECT {group_key}, SUM(quantity), SUM(total_price), MIN(sale_ts)
+                FROM ({sales})
+                GROUP BY {group_key}
+            """, params)
+            # Committed before the next window's ATTACH, which a transaction would refuse
+            self.connection.commit()
+        return "temp.sales_group_totals"
+
+    def archived_years(self):
+        """[(year, file_name, sales, orders, archived_at), ...] of the years moved out to archives."""
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT year, file_name, sales, orders, archived_at FROM sales_archives ORDER BY year")
         return cursor.fetchall()
 
+    def unarchived_years(self, before_year):
+        """Years before `before_year` that still have sales or orders in this database."""
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT CAST(strftime('%Y', sale_ts, 'unixepoch') AS INTEGER) AS year FROM sales WHERE sale_ts < ?
+            UNION
+            SELECT CAST(substr(order_date, 1, 4) AS INTEGER) FROM orders WHERE order_date < ?
+            ORDER BY year
+        """, (year_bounds(before_year)[0], f"{before_year}-01-01"))
+        return [row[0] for row in cursor.fetchall()]
+
+    @retry_on_busy
+    def archive_sales_year(self, year):
+        """Move a closed year of sales and orders out to its own archive file.
+
+        The rows are copied into the archive and committed there first; a
+        second transaction then deletes them from this database and raises
+        the year's watermark in sales_archives. Readers only take archive rows
+        up to the watermark, so until that commit the copied rows are read from
+        this database alone, also when a year already archived is archived
+        again for late rows. A crash in between leaves the rows in both files
+        with only this database's copy being read, and archiving the year
+        again finishes the move. Returns (sales, orders) moved.
+        """
+        if year >= datetime.now().year:
+            raise ValueError(f"{year} is not a closed year yet")
+        if self.db_name == ":memory:":
+            raise ValueError("An in-memory database has nowhere to archive to")
+
+        file_name = archive_file_name(self.db_name, year)
+        cursor = self.connection.cursor()
+
+        schema, = self._attach_archives([(year, file_name)], create=True)
+        try:
+            return self._move_year(cursor, schema, year, file_name)
+        finally:
+            # Archiving many years in a row must not run into the attach limit
+            self._detach_archive(schema)
+
+    def _move_year(self, cursor, schema, year, file_name):
+        """Copy, then delete, one year's rows into the attached archive `schema`; returns (sales, orders) moved."""
+        first_ts, last_ts = year_bounds(year)
+        first_date, last_date = f"{year}-01-01 00:00:00", f"{year}-12-31 23:59:59"
+        # The archive copy must be on disk before the rows are deleted here
+        cursor.execute(f"PRAGMA {schema}.synchronous = FULL")
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {schema}.sales (
+                sale_id INTEGER PRIMARY KEY,
+                order_id INTEGER,
+                item_id INTEGER,
+                item_name TEXT,
+                unit_price REAL,
+                quantity INTEGER,
+                total_price REAL,
+                sale_date TEXT,
+                sale_ts INTEGER
+            )
+        """)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_sales_sale_ts ON sales(sale_ts)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_sales_order_id ON sales(order_id)")
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {schema}.orders (
+                order_id INTEGER PRIMARY KEY,
+                order_total REAL,
+                total_items INTEGER,
+                order_date TEXT,
+                journal_id TEXT
+            )
+        """)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_orders_order_date ON orders(order_date)")
+        self.connection.commit()
+
+        try:
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO {schema}.sales ({ARCHIVE_SALE_COLUMNS})
+                SELECT {ARCHIVE_SALE_COLUMNS} FROM main.sales WHERE sale_ts BETWEEN ? AND ?
+            """, (first_ts, last_ts))
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO {schema}.orders ({ARCHIVE_ORDER_COLUMNS})
+                SELECT {ARCHIVE_ORDER_COLUMNS} FROM main.orders WHERE order_date BETWEEN ? AND ?
+            """, (first_date, last_date))
+            self.connection.commit()
+
+            cursor.execute("BEGIN IMMEDIATE")
+            # Only rows the archive has committed; anything recorded since stays here until the next run
+            cursor.execute(f"""
+                DELETE FROM main.sales
+                WHERE sale_ts BETWEEN ? AND ? AND sale_id IN (SELECT sale_id FROM {schema}.sales)
+            """, (first_ts, last_ts))
+            moved_sales = cursor.rowcount
+            cursor.execute(f"""
+                DELETE FROM main.orders
+                WHERE order_date BETWEEN ? AND ? AND order_id IN (SELECT order_id FROM {schema}.orders)
+            """, (first_date, last_date))
+            moved_orders = cursor.rowcount
+            cursor.execute(f"""
+                INSERT INTO sales_archives (year, file_name, first_ts, last_ts, sales, orders, archived_at,
+                                            max_sale_id, max_order_id)
+                VALUES (?, ?, ?, ?, (SELECT COUNT(*) FROM {schema}.sales), (SELECT COUNT(*) FROM {schema}.orders), ?,
+                        (SELECT MAX(sale_id) FROM {schema}.sales), (SELECT MAX(order_id) FROM {schema}.orders))
+                ON CONFLICT (year) DO UPDATE SET
+                    file_name = excluded.file_name,
+                    sales = excluded.sales,
+                    orders = excluded.orders,
+                    archived_at = excluded.archived_at,
+                    max_sale_id = excluded.max_sale_id,
+                    max_order_id = excluded.max_order_id
+            """, (year, file_name, first_ts, last_ts, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        return moved_sales, moved_orders
+
+    def vacuum(self):
+        """Rebuild the database file so space freed by archiving is given back to the disk."""
+        self.connection.execute("VACUUM")
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
 
     def close(self):
-        self.connection.close()
+        """Release this instance's hold on the shared connection."""
+        if not self.closed:
+            self.closed = True
+            connection_manager.release(self.db_name)
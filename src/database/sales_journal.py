@@ -0,0 +1,323 @@
+# sales_journal.py
+import atexit
+import glob
+import json
+import os
+import re
+import threading
+import uuid
+from datetime import datetime
+from database.file_lock import FileLocked, lock_file, unlock_file
+from database.inventory_db import Database, TERMINAL_ID, to_timestamp
+
+# Set INVENTORY_SALES_JOURNAL=1 to journal checkouts instead of committing each one
+JOURNAL_ENV = "INVENTORY_SALES_JOURNAL"
+
+# The flusher applies whatever has been journaled at least this often (seconds)
+FLUSH_INTERVAL = 0.2
+
+# Most journaled orders applied per SQLite transaction
+FLUSH_BATCH_SIZE = 200
+
+# How long close() waits for the flusher to apply what is left (seconds)
+CLOSE_TIMEOUT = 10
+
+
+def journal_requested():
+    return os.environ.get(JOURNAL_ENV, "") not in ("", "0")
+
+
+def journal_path(db_name, terminal_id=TERMINAL_ID):
+    """The journal file of one till, next to the database file: <db>.<till id>.sales-journal."""
+    safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", terminal_id)
+    return f"{os.path.abspath(db_name)}.{safe_id}.sales-journal"
+
+
+class JournalLocked(FileLocked):
+    """Another process already has this journal open."""
+
+
+def lock_journal(path):
+    """Take the exclusive lock on a journal (its .lock file); returns the open lock file.
+
+    Raises JournalLocked if another process holds it. The lock goes away with
+    the lock file's handle, so a till that crashed never leaves it behind.
+    """
+    try:
+        return lock_file(path + ".lock")
+    except FileLocked:
+        raise JournalLocked(f"{path} is in use by another process")
+
+
+def unlock_journal(fp):
+    unlock_file(fp)
+
+
+class SalesJournal:
+    """Write-ahead log for checkouts, applied to SQLite in batches.
+
+    place_order appends the order to a local log file and fsyncs it, and
+    returns as soon as the order is durable. Orders placed while an fsync is
+    in progress wait for the next one, which then covers all of them (group
+    commit), so concurrent checkouts share fsyncs. A background flusher applies
+    journaled orders to orders/sales/Items in batched transactions, so a
+    busy till commits to SQLite a few times a second instead of once per
+    sale, and never waits on another terminal's lock at the counter.
+
+    Only orders fully covered by this terminal's stock reservations are
+    journaled, so the stock is already held against other terminals; any
+    other order is placed directly with Database.place_order.
+
+    Each till has its own journal file and holds an exclusive lock on it
+    while open, so no other process appends to or truncates it. Orders that
+    were journaled but not yet applied when the process stopped are
+    replayed by replay_journals at the next startup, or when the journal is
+    next opened; orders.journal_id keeps a replay from writing an order twice.
+    """
+
+    def __init__(self, db_name="inventory.db", terminal_id=TERMINAL_ID, path=None):
+        self.db_name = db_name
+        self.terminal_id = terminal_id
+        self.path = path or journal_path(db_name, terminal_id)
+        self.lock_file = lock_journal(self.path)
+        self.lock = threading.Condition()
+        self.wakeup = threading.Event()
+        self.unsynced = []  # Records accepted but not yet written and fsynced, oldest first
+        self.queue = []     # Records durable in the file but not yet applied, oldest first
+        self.pending = {}   # (terminal_id, item_id) -> units journaled but not yet applied
+        self.journaled = 0  # Records accepted so far; a record's number is its position in this count
+        self.durable = 0    # Records written and fsynced so far
+        self.syncing = False
+        self.sync_error = None
+        self.stopped = False
+
+        try:
+            _replay_locked(self.db_name, self.path)
+        except Exception:
+            unlock_journal(self.lock_file)
+            raise
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.thread = threading.Thread(target=self._run_flusher, name="sales-journal", daemon=True)
+        self.thread.start()
+
+    def place_order(self, db, cart):
+        """Journal an order for this till, or place it directly if its stock is not fully reserved.
+
+        Returns (order_id, shortages, journal_id): journaled orders have no
+        order_id yet and come back as (None, [], journal_id); orders placed
+        directly return Database.place_order's result with journal_id None.
+        """
+        lines = [tuple(line) for line in cart]
+        requested = {}
+        for item_id, item_name, unit_price, quantity in lines:
+            requested[item_id] = requested.get(item_id, 0) + quantity
+
+        terminal_id = self.terminal_id
+        with self.lock:
+            held = db.terminal_reservations(requested, terminal_id)
+            covered = not self.stopped and self.sync_error is None and all(
+                held.get(item_id, 0) >= self.pending.get((terminal_id, item_id), 0) + quantity
+                for item_id, quantity in requested.items()
+            )
+            if covered:
+                now = datetime.now().replace(microsecond=0)
+                record = {
+                    "journal_id": uuid.uuid4().hex,
+                    "terminal_id": terminal_id,
+                    "order_date": now.strftime('%Y-%m-%d %H:%M:%S'),
+                    "sale_ts": to_timestamp(now),
+                    "lines": lines,
+                }
+                self.unsynced.append(record)
+                self.journaled += 1
+                for item_id, quantity in requested.items():
+                    key = (terminal_id, item_id)
+                    self.pending[key] = self.pending.get(key, 0) + quantity
+                self._wait_durable(self.journaled)  # Durable before the till reports success
+                if len(self.queue) >= FLUSH_BATCH_SIZE:
+                    self.wakeup.set()  # Otherwise orders collect until the next FLUSH_INTERVAL tick
+                return None, [], record["journal_id"]
+
+        # Not all of it is held; let journaled orders land first so stock checks see them
+        self.drain()
+        order_id, shortages = db.place_order(lines, terminal_id)
+        return order_id, shortages, None
+
+    def _wait_durable(self, number):
+        """Return once record `number` is fsynced; called with self.lock held.
+
+        The first caller to find no fsync in progress writes every record
+        accepted so far and fsyncs once for all of them, with the lock released
+        so more orders can be accepted meanwhile; the others wait for it.
+        """
+        while self.durable < number:
+            if self.sync_error is not None:
+                raise self.sync_error
+            if self.syncing:
+                self.lock.wait()
+                continue
+            records, self.unsynced = self.unsynced, []
+            self.syncing = True
+            self.lock.release()
+            try:
+                self.file.write("".join(json.dumps(record) + "\n" for record in records))
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            except Exception as e:
+                # These orders were never acknowledged; journaling stops and checkouts go direct
+                self.sync_error = e
+            finally:
+                self.lock.acquire()
+                self.syncing = False
+                self.lock.notify_all()
+            if self.sync_error is None:
+                self.durable += len(records)
+                self.queue.extend(records)
+            else:
+                # Orders accepted behind the failed fsync fail with it
+                self._release_pending(records + self.unsynced)
+                self.unsynced = []
+
+    def _release_pending(self, records):
+        """Take records off self.pending once they are applied (or will never be); called with self.lock held."""
+        for record in records:
+            for item_id, item_name, unit_price, quantity in record["lines"]:
+                key = (record["terminal_id"], item_id)
+                self.pending[key] -= quantity
+                if self.pending[key] <= 0:
+                    del self.pending[key]
+
+    def drain(self, timeout=None):
+        """Wait until every journaled order has been applied; returns False on timeout."""
+        with self.lock:
+            self.wakeup.set()
+            return self.lock.wait_for(lambda: not self.queue and not self.unsynced and not self.syncing, timeout)
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """Apply what is left and stop the flusher; anything unapplied is replayed next time."""
+        if self.stopped:
+            return
+        self.drain(timeout)
+        with self.lock:
+            self.stopped = True
+        self.wakeup.set()
+        self.thread.join(timeout)
+        self.file.close()
+        unlock_journal(self.lock_file)
+
+    def _run_flusher(self):
+        db = Database(self.db_name)
+        try:
+            while True:
+                self.wakeup.wait(FLUSH_INTERVAL)
+                self.wakeup.clear()
+                with self.lock:
+                    batch = self.queue[:FLUSH_BATCH_SIZE]
+                    if not batch and self.stopped:
+                        break
+                if not batch:
+                    continue
+
+                try:
+                    db.apply_journaled_orders(batch)
+                except Exception as e:
+                    # The records stay queued (and in the file) and are retried on the next pass
+                    print(f"Sales journal: could not apply {len(batch)} order(s), will retry: {e}")
+                    if self.stopped:
+                        break
+                    continue
+
+                with self.lock:
+                    del self.queue[:len(batch)]
+                    self._release_pending(batch)
+                    if not self.queue and not self.unsynced and not self.syncing:
+                        # Everything journaled is in SQLite now; only this process writes this till's file
+                        self.file.seek(0)
+                        self.file.truncate()
+                        self.file.flush()
+                        os.fsync(self.file.fileno())
+                    self.lock.notify_all()
+        finally:
+            db.close()
+
+
+def replay_journal(db_name="inventory.db", path=None):
+    """Apply orders left in a journal file by a previous run, then empty it; returns how many were new.
+
+    Returns 0 without touching the file if a running till has it open.
+    """
+    path = path or journal_path(db_name)
+    if not os.path.exists(path):
+        return 0
+    try:
+        lock = lock_journal(path)
+    except JournalLocked:
+        return 0
+    try:
+        return _replay_locked(db_name, path)
+    finally:
+        unlock_journal(lock)
+
+
+def replay_journals(db_name="inventory.db"):
+    """Startup recovery: replay every till's leftover journal for a database that no running till has open.
+
+    Runs whether or not journaling is switched on, so orders acknowledged
+    before a crash are never stranded; returns how many orders were new.
+    """
+    pattern = glob.escape(os.path.abspath(db_name)) + ".*.sales-journal"
+    return sum(replay_journal(db_name, path) for path in sorted(glob.glob(pattern)))
+
+
+def _replay_locked(db_name, path):
+    """replay_journal for a caller that holds the journal's lock, so nothing is appended meanwhile."""
+    records = read_journal(path)
+    applied = 0
+    if records:
+        db = Database(db_name)
+        try:
+            for start in range(0, len(records), FLUSH_BATCH_SIZE):
+                applied += db.apply_journaled_orders(records[start:start + FLUSH_BATCH_SIZE])
+        finally:
+            db.close()
+        print(f"Sales journal: replayed {applied} order(s) from {path}.")
+    if os.path.exists(path):
+        with open(path, "w", encoding="utf-8") as fp:
+            os.fsync(fp.fileno())
+    return applied
+
+
+def read_journal(path):
+    """The records in a journal file. A torn last line (a crash mid-append) was never acknowledged and is skipped."""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding="utf-8") as fp:
+        for line in fp:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                print(f"Sales journal: skipping an incomplete record in {path}")
+    return records
+
+
+_journals = {}
+
+
+def get_sales_journal(db_name="inventory.db"):
+    """Return this till's process-wide SalesJournal for a database, replaying its file on first use."""
+    key = os.path.abspath(db_name)
+    if key not in _journals:
+        _journals[key] = SalesJournal(db_name)
+    return _journals[key]
+
+
+def close_all():
+    for journal in _journals.values():
+        journal.close()
+
+
+atexit.register(close_all)
@@ -8,3 +8,8 @@ def center_window(window, width=800, height=600):
     y = (screen_height // 2) - (height // 2)
     window.geometry(f"{width}x{height}+{x}+{y}")
     window.update()
+
+def set_busy_cursor(window, busy):
+    """Show a wait cursor on `window` while background work is running."""
+    if window.winfo_exists():
+        window.config(cursor="watch" if busy else "")
@@ -1,10 +1,52 @@
 # main.py
+import time
+
+# Taken before anything else is imported, for the startup timing report
+STARTED = time.perf_counter()
+
+import os
+import sys
 import tkinter as tk
 from ui.login import LoginWindow
 
+# Set INVENTORY_STARTUP_TIMING=1 (or pass --startup-timing) to print how long each startup phase took
+STARTUP_TIMING_ENV = "INVENTORY_STARTUP_TIMING"
+
+
+class StartupTimer:
+    def __init__(self, started):
+        self.started = started
+        self.last = started
+        self.phases = []
+
+    def mark(self, phase):
+        """Record the time since the previous mark as `phase`."""
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    def report(self):
+        lines = ["Startup timing:"]
+        lines += [f"  {phase:28} {ms:8.1f} ms" for phase, ms in self.phases]
+        lines.append(f"  {'login screen up after':28} {(self.last - self.started) * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+def startup_timing_requested():
+    return "--startup-timing" in sys.argv or os.environ.get(STARTUP_TIMING_ENV, "") not in ("", "0")
+
+
 def main():
+    timer = StartupTimer(STARTED)
+    timer.mark("imports")
     root = tk.Tk()
+    timer.mark("Tk root")
     app = LoginWindow(root)
+    timer.mark("login window + schema check")
+    if startup_timing_requested():
+        root.update()  # Let the login window draw before taking the last mark
+        timer.mark("first draw")
+        print(timer.report())
     root.mainloop()
 
 if __name__ == "__main__":
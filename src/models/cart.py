@@ -0,0 +1,83 @@
+# cart.py
+from decimal import Decimal, ROUND_HALF_UP
+
+
+def to_cents(price):
+    """Integer cents for a price given as a number or a "$x.yy" string."""
+    amount = Decimal(str(price).strip().lstrip("$"))
+    return int((amount * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def format_cents(cents):
+    """"$x.yy" for an amount in integer cents."""
+    return f"${cents // 100}.{cents % 100:02d}"
+
+
+class CartLine:
+    __slots__ = ("item_id", "item_name", "unit_cents", "quantity")
+
+    def __init__(self, item_id, item_name, unit_cents, quantity):
+        self.item_id = item_id
+        self.item_name = item_name
+        self.unit_cents = unit_cents
+        self.quantity = quantity
+
+    @property
+    def line_cents(self):
+        return self.unit_cents * self.quantity
+
+    def __str__(self):
+        return f"{self.item_name} x {self.quantity} - {format_cents(self.line_cents)}"
+
+
+class Cart:
+    """A point-of-sale basket keyed by item_id.
+
+    Adding an item that is already in the cart merges into its line, and the
+    totals are kept up to date in integer cents as lines change, so nothing
+    is re-summed or re-parsed per add. Lines keep the order they were first
+    added in; position() gives a line's row in a cart Listbox.
+    """
+
+    def __init__(self):
+        self.lines = {}      # item_id -> CartLine, in insertion order
+        self.positions = {}  # item_id -> index of its line
+        self.total_cents = 0
+        self.total_items = 0
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines.values())
+
+    def quantity(self, item_id):
+        """Units of an item already in the cart."""
+        line = self.lines.get(item_id)
+        return line.quantity if line else 0
+
+    def position(self, item_id):
+        return self.positions.get(item_id)
+
+    def add(self, item_id, item_name, price, quantity):
+        """Add `quantity` units at `price`; returns (line, is_new_line)."""
+        line = self.lines.get(item_id)
+        is_new = line is None
+        if is_new:
+            line = CartLine(item_id, item_name, to_cents(price), 0)
+            self.positions[item_id] = len(self.lines)
+            self.lines[item_id] = line
+        line.quantity += quantity
+        self.total_cents += line.unit_cents * quantity
+        self.total_items += quantity
+        return line, is_new
+
+    def clear(self):
+        self.lines = {}
+        self.positions = {}
+        self.total_cents = 0
+        self.total_items = 0
+
+    def order_lines(self):
+        """(item_id, item_name, unit_price, quantity) lines for Database.place_order."""
+        return [(line.item_id, line.item_name, line.unit_cents / 100, line.quantity) for line in self]
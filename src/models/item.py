@@ -1,6 +1,23 @@
 # item.py
 class Item:
-    def __init__(self, name, price, quantity):
+    # Column order of the Items rows Database selects into this class
+    COLUMNS = ("item_id", "name", "price", "quantity", "reorder_level", "barcode")
+
+    __slots__ = COLUMNS
+
+    def __init__(self, name, price, quantity, item_id=None, reorder_level=0, barcode=None):
+        self.item_id = item_id
         self.name = name
         self.price = price
         self.quantity = quantity
+        self.reorder_level = reorder_level  # On the low-stock watchlist at or below this quantity
+        self.barcode = barcode              # Unique SKU/barcode, or None
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        """sqlite3 row factory for rows selected as Item.COLUMNS."""
+        item_id, name, price, quantity, reorder_level, barcode = row
+        return cls(name, price, quantity, item_id, reorder_level, barcode)
+
+    def __repr__(self):
+        return f"Item(item_id={self.item_id}, name={self.name!r}, price={self.price}, quantity={self.quantity})"
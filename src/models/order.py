@@ -1,9 +1,22 @@
 # order.py
 class Order:
-    def __init__(self, order_total, total_items, order_date):
+    # Column order of the orders rows Database selects into this class
+    COLUMNS = ("order_id", "order_total", "total_items", "order_date", "journal_id")
+
+    __slots__ = COLUMNS
+
+    def __init__(self, order_total, total_items, order_date, order_id=None, journal_id=None):
+        self.order_id = order_id        # Primary key, None until saved
         self.order_total = order_total  # Total price of the order
         self.total_items = total_items  # Number of items in the order
         self.order_date = order_date    # Date when the order was placed
+        self.journal_id = journal_id    # Sales journal record it was applied from, if any
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        """sqlite3 row factory for rows selected as Order.COLUMNS."""
+        order_id, order_total, total_items, order_date, journal_id = row
+        return cls(order_total, total_items, order_date, order_id, journal_id)
 
     def __str__(self):
         return f"Order(Date: {self.order_date}, Items: {self.total_items}, Total: ${self.order_total:.2f})"
@@ -1,13 +1,31 @@
 # sales.py
 class Sale:
-    def __init__(self, order_id, item_id, item_name, unit_price, quantity, sale_date):
+    # Column order of the sales rows Database selects into this class
+    COLUMNS = (
+        "sale_id", "order_id", "item_id", "item_name", "unit_price",
+        "quantity", "total_price", "sale_date", "sale_ts",
+    )
+
+    __slots__ = COLUMNS
+
+    def __init__(self, order_id, item_id, item_name, unit_price, quantity, sale_date,
+                 sale_id=None, total_price=None, sale_ts=None):
+        self.sale_id = sale_id            # Primary key, None until saved
         self.order_id = order_id          # Associated order ID
         self.item_id = item_id            # Item ID being sold
         self.item_name = item_name        # Item name
         self.unit_price = unit_price      # Price per unit
         self.quantity = quantity          # Quantity sold
-        self.total_price = unit_price * quantity  # Calculated total price
+        # Calculated total price unless the stored one is given
+        self.total_price = unit_price * quantity if total_price is None else total_price
         self.sale_date = sale_date        # Date of the sale
+        self.sale_ts = sale_ts            # sale_date as epoch seconds (see to_timestamp)
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        """sqlite3 row factory for rows selected as Sale.COLUMNS."""
+        sale_id, order_id, item_id, item_name, unit_price, quantity, total_price, sale_date, sale_ts = row
+        return cls(order_id, item_id, item_name, unit_price, quantity, sale_date, sale_id, total_price, sale_ts)
 
     def __str__(self):
         return (f"Sale(Item: {self.item_name}, Quantity: {self.quantity}, "
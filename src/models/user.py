@@ -1,6 +1,18 @@
 # user.py
 class User:
-    def __init__(self, username, password, role):
+    # Column order of the Users rows Database selects into this class
+    COLUMNS = ("id", "username", "password", "role")
+
+    __slots__ = ("user_id", "username", "password", "role")
+
+    def __init__(self, username, password, role, user_id=None):
+        self.user_id = user_id
         self.username = username
         self.password = password
         self.role = role
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        """sqlite3 row factory for rows selected as User.COLUMNS."""
+        user_id, username, password, role = row
+        return cls(username, password, role, user_id)
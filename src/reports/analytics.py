@@ -0,0 +1,134 @@
+# analytics.py
+"""Catalogue-wide sales analytics computed with NumPy.
+
+Daily sales per item are loaded from the daily_item_sales rollup into one
+items x days matrix, and every statistic is computed for the whole catalogue
+with array operations; there is no per-item Python loop.
+"""
+from datetime import datetime, timedelta
+from database.inventory_db import SECONDS_PER_DAY, day_bounds
+
+try:
+    import numpy as np
+except ImportError:  # Analytics are optional; the rest of the app runs without NumPy
+    np = None
+
+# Days of history the statistics are computed over
+HISTORY_DAYS = 90
+
+# Window of the trailing moving average
+MOVING_AVERAGE_DAYS = 7
+
+# Days between placing a reorder and the stock arriving
+LEAD_TIME_DAYS = 7
+
+# Standard deviations of safety stock (1.65 ~ 95% of lead times without a stock-out)
+SAFETY_FACTOR = 1.65
+
+
+def numpy_available():
+    return np is not None
+
+
+def load_daily_series(db, end_date=None, days=HISTORY_DAYS):
+    """Load the catalogue and its daily sales as arrays.
+
+    Returns a dict with item_ids (sorted), names, stock (current Items.quantity)
+    and sales, an items x days float matrix of units sold per day ending on
+    end_date. Items with no sales in the window have a row of zeros.
+    """
+    if np is None:
+        raise RuntimeError("Sales analytics need NumPy: pip install numpy")
+
+    end_date = end_date or datetime.now()
+    start_date = end_date - timedelta(days=days - 1)
+    first_day = day_bounds(start_date, end_date)[0] // SECONDS_PER_DAY
+
+    items = list(db.iter_items())  # In item_id order, as searchsorted needs
+    item_ids = np.fromiter((item.item_id for item in items), dtype=np.int64, count=len(items))
+    stock = np.fromiter((item.quantity for item in items), dtype=np.float64, count=len(items))
+    names = [item.name for item in items]
+
+    rows = np.fromiter(
+        db.iter_daily_item_quantities(start_date, end_date),
+        dtype=[("day", np.int64), ("item_id", np.int64), ("quantity", np.float64)]
+    )
+    sales = np.zeros((len(items), days), dtype=np.float64)
+    if len(items) and len(rows):
+        # Rollup rows of deleted items have no catalogue row to land in
+        positions = np.searchsorted(item_ids, rows["item_id"])
+        positions = np.minimum(positions, len(items) - 1)
+        known = item_ids[positions] == rows["item_id"]
+        sales[positions[known], rows["day"][known] - first_day] = rows["quantity"][known]
+
+    return {"item_ids": item_ids, "names": names, "stock": stock, "sales": sales, "end_date": end_date}
+
+
+def moving_average(sales, window=MOVING_AVERAGE_DAYS):
+    """Trailing moving average along the day axis; column i averages days i..i+window-1."""
+    window = max(1, min(window, sales.shape[1]))
+    totals = np.cumsum(sales, axis=1)
+    totals = np.concatenate([np.zeros((sales.shape[0], 1)), totals], axis=1)
+    return (totals[:, window:] - totals[:, :-window]) / window
+
+
+def trend(sales):
+    """Least-squares slope of daily sales per item, in units/day gained per day."""
+    days = np.arange(sales.shape[1], dtype=np.float64)
+    centred = days - days.mean()
+    denominator = (centred ** 2).sum()
+    if denominator == 0:
+        return np.zeros(sales.shape[0])
+    return (sales - sales.mean(axis=1, keepdims=True)) @ centred / denominator
+
+
+def analyse_catalogue(db, end_date=None, days=HISTORY_DAYS, lead_time=LEAD_TIME_DAYS,
+                      safety_factor=SAFETY_FACTOR):
+    """Velocity, trend, days of stock and reorder points for every item in one pass.
+
+    Returns the load_daily_series dict extended with per-item arrays:
+      velocity        -- mean units sold per day over the window
+      moving_average  -- mean units per day over the last MOVING_AVERAGE_DAYS
+      trend           -- slope of daily sales (positive means selling faster)
+      days_of_stock   -- stock / velocity (inf for items that are not selling)
+      reorder_point   -- velocity * lead_time plus safety stock for demand swings
+      needs_reorder   -- stock at or below the reorder point, for items that sell
+    """
+    series = load_daily_series(db, end_date, days)
+    sales, stock = series["sales"], series["stock"]
+
+    velocity = sales.mean(axis=1)
+    recent = moving_average(sales)[:, -1] if sales.shape[0] else velocity
+    safety_stock = safety_factor * sales.std(axis=1) * np.sqrt(lead_time)
+    reorder_point = np.ceil(velocity * lead_time + safety_stock)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_of_stock = np.where(velocity > 0, stock / velocity, np.inf)
+
+    series.update({
+        "velocity": velocity,
+        "moving_average": recent,
+        "trend": trend(sales),
+        "days_of_stock": days_of_stock,
+        "reorder_point": reorder_point,
+        "needs_reorder": (velocity > 0) & (stock <= reorder_point),
+    })
+    return series
+
+
+def reorder_suggestions(analytics, limit=None):
+    """Items that need reordering, soonest to run out first.
+
+    Returns [(item_id, name, stock, velocity, days_of_stock, reorder_point), ...].
+    """
+    flagged = np.flatnonzero(analytics["needs_reorder"])
+    flagged = flagged[np.argsort(analytics["days_of_stock"][flagged], kind="stable")]
+    if limit is not None:
+        flagged = flagged[:limit]
+    return [
+        (
+            int(analytics["item_ids"][i]), analytics["names"][i], int(analytics["stock"][i]),
+            float(analytics["velocity"][i]), float(analytics["days_of_stock"][i]),
+            int(analytics["reorder_point"][i]),
+        )
+        for i in flagged
+    ]
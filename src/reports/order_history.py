@@ -0,0 +1,150 @@
+# order_history.py
+import tkinter as tk
+from tkinter import messagebox, ttk
+from database.inventory_db import ORDERS_PAGE_SIZE
+from database.executor import get_executor
+from helper import center_window, set_busy_cursor
+
+# Columns of the order list and of an order's detail window
+ORDER_COLUMNS = ("Order #", "Date", "Items", "Total")
+LINE_COLUMNS = ("Item", "Unit Price", "Quantity", "Total")
+
+
+class OrderHistory:
+    """Browse past orders, newest first, and open one with all of its lines."""
+
+    def __init__(self, main_window, role):
+        self.root = tk.Toplevel(main_window)
+        self.root.title(f"{role} - Order History")
+        center_window(self.root, 800, 600)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+        # Pages and lookups run on the background executor
+        self.executor = get_executor(self.root)
+        self.executor.add_busy_listener(self.on_busy)
+        self.job = None
+        self.last_order = None  # (order_date, order_id) of the last row shown; the next page starts after it
+
+        tk.Label(self.root, text="Order History", font=("Arial", 18)).pack(pady=10)
+
+        # Receipts and disputes: jump straight to an order number
+        search_bar = tk.Frame(self.root)
+        search_bar.pack(pady=5)
+        tk.Label(search_bar, text="Order #:", font=("Arial", 12)).pack(side="left", padx=5)
+        self.order_entry = tk.Entry(search_bar, font=("Arial", 12), width=12)
+        self.order_entry.pack(side="left")
+        self.order_entry.bind("<Return>", lambda event: self.find_order())
+        tk.Button(search_bar, text="Open", command=self.find_order, font=("Arial", 12)).pack(side="left", padx=5)
+
+        table_frame = tk.Frame(self.root)
+        table_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        self.tree = ttk.Treeview(table_frame, columns=ORDER_COLUMNS, show="headings")
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        for col in ORDER_COLUMNS:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, anchor="center", width=180)
+        self.tree.pack(fill="both", expand=True)
+        self.tree.bind("<Double-1>", lambda event: self.open_selected())
+
+        footer = tk.Frame(self.root)
+        footer.pack(fill="x", padx=10, pady=5)
+        self.status_label = tk.Label(footer, text="", font=("Arial", 11), fg="gray")
+        self.status_label.pack(side="left")
+        self.load_more_button = tk.Button(footer, text="Load More", command=self.load_page, state="disabled",
+                                          font=("Arial", 12))
+        self.load_more_button.pack(side="right")
+        tk.Button(footer, text="Close", command=self.close, font=("Arial", 12), bg="red", fg="white").pack(side="right", padx=10)
+
+        self.load_page()
+
+    def load_page(self):
+        """Append the next page of orders after the last one shown."""
+        if self.job is not None:
+            return
+        before = self.last_order
+        self.load_more_button.config(state="disabled")
+        self.job = self.executor.submit(
+            lambda db: db.fetch_orders_page(before, ORDERS_PAGE_SIZE),
+            on_done=self.display_page,
+            on_error=self.failed
+        )
+
+    def display_page(self, orders):
+        self.job = None
+        for order in orders:
+            if self.tree.exists(str(order.order_id)):
+                continue  # Already listed; a row id may only appear once
+            self.tree.insert("", "end", iid=str(order.order_id), values=(
+                order.order_id, order.order_date, order.total_items, f"${order.order_total:.2f}"
+            ))
+        if orders:
+            self.last_order = (orders[-1].order_date, orders[-1].order_id)
+        shown = len(self.tree.get_children())
+        self.status_label.config(text=f"{shown} order(s) shown" if shown else "No orders yet")
+        self.load_more_button.config(state="normal" if len(orders) == ORDERS_PAGE_SIZE else "disabled")
+
+    def open_selected(self):
+        selected = self.tree.focus()
+        if selected:
+            self.open_order(int(selected))
+
+    def find_order(self):
+        try:
+            order_id = int(self.order_entry.get().strip().lstrip("#"))
+        except ValueError:
+            messagebox.showerror("Error", "Enter an order number.")
+            return
+        self.open_order(order_id)
+
+    def open_order(self, order_id):
+        """Fetch one order and its lines off the Tk thread and show them."""
+        self.executor.submit(
+            lambda db: db.fetch_order(order_id),
+            on_done=lambda result: self.display_order(order_id, result),
+            on_error=lambda e: messagebox.showerror("Error", f"Could not load order #{order_id}: {e}")
+        )
+
+    def display_order(self, order_id, result):
+        if result is None:
+            messagebox.showinfo("Not Found", f"There is no order #{order_id}.")
+            return
+        order, lines = result
+
+        window = tk.Toplevel(self.root)
+        window.title(f"Order #{order.order_id}")
+        center_window(window, 700, 400)
+        heading = f"Order #{order.order_id} - {order.order_date}"
+        if order.journal_id:
+            heading += f" (receipt {order.journal_id[:8]})"
+        tk.Label(window, text=heading, font=("Arial", 13, "bold")).pack(pady=10)
+
+        tree = ttk.Treeview(window, columns=LINE_COLUMNS, show="headings")
+        for col in LINE_COLUMNS:
+            tree.heading(col, text=col)
+            tree.column(col, anchor="center", width=160)
+        for sale in lines:
+            tree.insert("", "end", values=(
+                sale.item_name, f"${sale.unit_price:.2f}", sale.quantity, f"${sale.total_price:.2f}"
+            ))
+        tree.pack(fill="both", expand=True, padx=10, pady=5)
+        tk.Label(window, text=f"Items: {order.total_items}    Total: ${order.order_total:.2f}",
+                 font=("Arial", 12, "bold"), fg="purple").pack(pady=10)
+
+    def failed(self, error):
+        self.job = None
+        self.load_more_button.config(state="normal")  # Let the user try the page again
+        messagebox.showerror("Error", f"Could not load orders: {error}")
+
+    def on_busy(self, busy):
+        """Executor busy listener: show a wait cursor while a page or order is loading."""
+        if self.root.winfo_exists():
+            set_busy_cursor(self.root, busy)
+
+    def close(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+        self.executor.remove_busy_listener(self.on_busy)
+        self.root.destroy()
@@ -0,0 +1,75 @@
+# report_cache.py
+import os
+import threading
+from collections import OrderedDict
+from database.inventory_db import day_bounds
+
+# Aggregated reports kept per process, least recently used dropped first
+REPORT_CACHE_SIZE = 32
+
+
+class CachedReport:
+    __slots__ = ("report", "start_date", "end_date", "high_water")
+
+    def __init__(self, report, start_date, end_date, high_water):
+        self.report = report
+        self.start_date = start_date
+        self.end_date = end_date
+        self.high_water = high_water  # sales_high_water_mark() when the report was computed
+
+
+class ReportCache:
+    """LRU cache of Database.aggregate_sales results.
+
+    Entries are keyed by database, whole-day range, grouping, order, page and summary.
+    Each remembers the sales high-water mark it was computed at; on lookup,
+    if sales have been recorded since then, only those new sales are checked
+    against the entry's range. An entry is recomputed when one of them falls
+    inside the range and is reused otherwise.
+
+    Cached reports are shared between callers and must not be modified.
+    """
+
+    def __init__(self, max_entries=REPORT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def aggregate_sales(self, db, start_date, end_date, group_by="item", order_by="quantity", limit=None, offset=0,
+                        with_summary=True):
+        """Database.aggregate_sales on `db`, answered from the cache when still valid."""
+        key = (os.path.abspath(db.db_name), day_bounds(start_date, end_date), group_by, order_by, limit, offset,
+               with_summary)
+        high_water = db.sales_high_water_mark()
+
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None:
+            if entry.high_water == high_water or not db.sales_added_between(
+                    entry.high_water, entry.start_date, entry.end_date):
+                entry.high_water = high_water  # Nothing new in range; skip this check next time
+                with self.lock:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                return entry.report
+
+        report = db.aggregate_sales(
+            start_date, end_date, group_by=group_by, order_by=order_by, limit=limit, offset=offset,
+            with_summary=with_summary
+        )
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = CachedReport(report, start_date, end_date, high_water)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return report
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+report_cache = ReportCache()
@@ -1,19 +1,38 @@
 import tkinter as tk
-from tkinter import messagebox
-from tkcalendar import Calendar  # Ensure to install tkcalendar: pip install tkcalendar
+from tkinter import messagebox, ttk
 from datetime import datetime, timedelta
-from database.inventory_db import Database  # Adjust as per your actual database import
-from helper import center_window
+from database.executor import get_executor
+from reports.report_cache import report_cache
+from helper import center_window, set_busy_cursor
+
+# Choices for how many items the report shows per page
+PAGE_SIZES = (25, 50, 100, 500)
+DEFAULT_PAGE_SIZE = 50
+
+# Most items listed in the reorder suggestions window
+REORDER_LIMIT = 200
+
+# Report columns and the aggregate_sales order each heading sorts by
+REPORT_COLUMNS = (("Item", "name"), ("Sold", "quantity"), ("Total Sales", "revenue"))
 
 class SalesReport:
     def __init__(self, main_window, role):
-        self.db = Database()
         self.main_window = main_window
         self.role = role
         self.root = tk.Toplevel(self.main_window)
         self.root.title(f"{self.role} - Sales Report")
         self.root.geometry("500x400")
         center_window(self.root, 1000, 800)
+        self.root.protocol("WM_DELETE_WINDOW", self.close_report)
+
+        # Reports run on the background executor; only the rendering happens on the Tk thread
+        self.executor = get_executor(self.root)
+        self.report_job = None
+
+        # The range on screen and how much of it is loaded
+        self.report_range = None
+        self.order_by = "quantity"
+        self.loaded_rows = 0
 
         # Title Label
         tk.Label(self.root, text="Sales Report", font=("Arial", 18)).pack(pady=10)
@@ -26,13 +45,56 @@ class SalesReport:
         # Custom Date Range Button
         tk.Button(self.root, text="Custom Date Range", bg="lightgreen", width=20, command=self.custom_date_range_picker, font=("Arial", 13, "bold")).pack(pady=10)
 
-        # Report Display Area
-        self.report_text = tk.Text(self.root, height=24, width=100, state='disabled')
-        self.report_text.pack(pady=10)
+        # Velocity and reorder points for the whole catalogue (needs NumPy)
+        tk.Button(self.root, text="Reorder Suggestions", bg="khaki", width=20, command=self.show_reorder_suggestions, font=("Arial", 13, "bold")).pack(pady=5)
+
+        # Busy indicator with a way to abandon a long report
+        status_frame = tk.Frame(self.root)
+        status_frame.pack()
+        self.status_label = tk.Label(status_frame, text="", font=("Arial", 11), fg="gray")
+        self.status_label.pack(side="left", padx=5)
+        self.cancel_button = tk.Button(status_frame, text="Cancel", command=self.cancel_report, state="disabled")
+        self.cancel_button.pack(side="left", padx=5)
+        self.executor.add_busy_listener(self.on_busy)
+
+        # Report Display Area: one page of items at a time, sorted by SQLite
+        self.create_report_table()
 
         # Close Button
         tk.Button(self.root, text="Close", width=20, command=self.close_report, font=("Arial", 13), bg="red", fg="white").pack(pady=10)
 
+    def create_report_table(self):
+        self.header_label = tk.Label(self.root, text="", font=("Arial", 14, "bold"), fg="blue")
+        self.header_label.pack()
+
+        options = tk.Frame(self.root)
+        options.pack()
+        tk.Label(options, text="Show top:", font=("Arial", 12)).pack(side="left")
+        self.page_size = tk.IntVar(value=DEFAULT_PAGE_SIZE)
+        page_choice = ttk.Combobox(options, textvariable=self.page_size, values=PAGE_SIZES, width=5, state="readonly")
+        page_choice.pack(side="left", padx=5)
+        page_choice.bind("<<ComboboxSelected>>", lambda event: self.reload_report())
+
+        table_frame = tk.Frame(self.root)
+        table_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        self.report_tree = ttk.Treeview(table_frame, columns=[label for label, _ in REPORT_COLUMNS], show="headings")
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.report_tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        self.report_tree.configure(yscrollcommand=scrollbar.set)
+        for label, order_by in REPORT_COLUMNS:
+            # Clicking a heading re-sorts the whole range in SQL, not just the loaded rows
+            self.report_tree.heading(label, text=label, command=lambda o=order_by: self.sort_report(o))
+            self.report_tree.column(label, anchor="center", width=250)
+        self.report_tree.pack(fill="both", expand=True)
+
+        footer = tk.Frame(self.root)
+        footer.pack(fill="x", padx=10)
+        self.summary_label = tk.Label(footer, text="", font=("Arial", 12, "bold"), fg="purple", justify="left")
+        self.summary_label.pack(side="left")
+        self.load_more_button = tk.Button(footer, text="Load More", command=self.load_more, state="disabled",
+                                          font=("Arial", 12))
+        self.load_more_button.pack(side="right")
+
     def generate_report(self, days):
         """Fetch and display sales data for the given time range."""
         end_date = datetime.now()
@@ -41,6 +103,9 @@ class SalesReport:
 
     def custom_date_range_picker(self):
         """Open a custom date range picker using tkcalendar."""
+        # tkcalendar (and babel behind it) is only loaded when a custom range is picked
+        from tkcalendar import Calendar  # Ensure to install tkcalendar: pip install tkcalendar
+
         picker_window = tk.Toplevel(self.root)
         picker_window.title("Select Date Range")
         picker_window.geometry("500x300")
@@ -66,65 +131,127 @@ class SalesReport:
             picker_window.destroy()  # Close the date picker window
 
     def fetch_and_display_data(self, start_date, end_date):
-        """Fetch data from the database and display the aggregated report."""
-        sales_data = self.db.get_sales_between_dates(start_date, end_date)
+        """Show the first page of the aggregated report for a date range."""
+        self.report_range = (start_date, end_date)
+        self.load_page(0)
+
+    def reload_report(self):
+        """Start the current range again from its first page (new page size or sort)."""
+        if self.report_range is not None:
+            self.load_page(0)
+
+    def sort_report(self, order_by):
+        self.order_by = order_by
+        self.reload_report()
+
+    def load_more(self):
+        self.load_page(self.loaded_rows)
 
-        # Handle empty results
-        if not sales_data:
-            messagebox.showinfo("No Data", "No sales data found for the selected range.")
+    def load_page(self, offset):
+        """Fetch one page of items, starting at `offset`, for the current range and sort."""
+        # A newer request replaces whatever report is still running
+        self.cancel_report()
+        start_date, end_date = self.report_range
+        order_by, limit = self.order_by, self.page_size.get()
+
+        # Grouping, paging, totals and the top seller are all computed by SQLite, off the Tk
+        # thread; repeat views of a range with no new sales come straight from the cache.
+        # Only the first page shows the totals, so later pages do not compute them again
+        self.report_job = self.executor.submit(
+            lambda db: report_cache.aggregate_sales(
+                db, start_date, end_date, group_by="item", order_by=order_by, limit=limit, offset=offset,
+                with_summary=offset == 0
+            ),
+            on_done=lambda report: self.display_report(report, start_date, end_date, offset),
+            on_error=self.report_failed
+        )
+
+    def display_report(self, report, start_date, end_date, offset=0):
+        """Render a page of an aggregate_sales result; later pages are appended."""
+        self.report_job = None
+
+        if offset == 0:
+            # A new range or sort replaces whatever the previous one left on screen
+            self.report_tree.delete(*self.report_tree.get_children())
+            self.loaded_rows = 0
+            self.header_label.config(text="")
+            self.summary_label.config(text="")
+
+            # Handle empty results
+            if not report["rows"]:
+                self.load_more_button.config(state="disabled")
+                messagebox.showinfo("No Data", "No sales data found for the selected range.")
+                return
+
+            self.header_label.config(text=f"Sales Report ({start_date.date()} to {end_date.date()})")
+            top_name, top_quantity, _ = report["top_seller"]
+            self.summary_label.config(
+                text=f"Total Revenue: ${report['total_revenue']:.2f}\n"
+                     f"Most Sold Item: {top_name} (Sold: {top_quantity} units)"
+            )
+
+        # Only the rows of this page are inserted, whatever the size of the catalogue
+        for name, quantity, total_price in report["rows"]:
+            self.report_tree.insert("", "end", values=(name, quantity, f"${total_price:.2f}"))
+        self.loaded_rows += len(report["rows"])
+        self.load_more_button.config(state="normal" if report["has_more"] else "disabled")
+
+    def show_reorder_suggestions(self):
+        """Compute catalogue analytics off the Tk thread and list the items to reorder."""
+        # NumPy is only imported the first time analytics are asked for
+        from reports.analytics import analyse_catalogue, numpy_available, reorder_suggestions
+
+        if not numpy_available():
+            messagebox.showerror("Error", "Reorder suggestions need NumPy. Install it with: pip install numpy")
+            return
+        self.cancel_report()
+        self.report_job = self.executor.submit(
+            lambda db: reorder_suggestions(analyse_catalogue(db), REORDER_LIMIT),
+            on_done=self.display_reorder_suggestions,
+            on_error=self.report_failed
+        )
+
+    def display_reorder_suggestions(self, suggestions):
+        self.report_job = None
+        if not suggestions:
+            messagebox.showinfo("Reorder Suggestions", "No items are at or below their reorder point.")
             return
 
-        # Aggregate sales data by item name
-        aggregated_data = {}
-        for item in sales_data:
-            name = item[3]          # item_name at index 3
-            quantity = item[5]      # quantity at index 5
-            total_price = item[6]   # total_price at index 6
-
-            if name in aggregated_data:
-                aggregated_data[name]['quantity'] += quantity
-                aggregated_data[name]['total_price'] += total_price
-            else:
-                aggregated_data[name] = {'quantity': quantity, 'total_price': total_price}
-
-        # Sort aggregated data by quantity in descending order
-        sorted_items = sorted(aggregated_data.items(), key=lambda x: x[1]['quantity'], reverse=True)
-
-        # Find the most sold item (first item in the sorted list)
-        most_sold_item = sorted_items[0]
-
-        # Clear previous content
-        self.report_text.config(state='normal')
-        self.report_text.delete(1.0, tk.END)
-
-        # Configure text tags for styling
-        self.report_text.tag_configure("header", font=("Arial", 14, "bold"), foreground="blue")
-        self.report_text.tag_configure("item", font=("Arial", 12), foreground="green")
-        self.report_text.tag_configure("total", font=("Arial", 12, "bold"), foreground="purple")
-        self.report_text.tag_configure("most_sold", font=("Arial", 12, "bold"), foreground="red")
-
-        # Insert header
-        self.report_text.insert(tk.END, f"Sales Report ({start_date.date()} to {end_date.date()}):\n\n", "header")
-        
-        total_sales = 0  # Track total revenue
-
-        # Insert each item (now sorted by quantity)
-        for name, data in sorted_items:
-            quantity = data['quantity']
-            total_price = data['total_price']
-            total_sales += total_price  # Calculate total revenue
-            
-            self.report_text.insert(tk.END, f"Item: {name}  ||  Sold: {quantity}  ||  Total Sales: ${total_price:.2f}\n", "item")
-
-        # Insert total revenue
-        self.report_text.insert(tk.END, f"\nTotal Revenue: ${total_sales:.2f}\n", "total")
-        
-        # Insert most sold item
-        self.report_text.insert(tk.END, f"\nMost Sold Item: {most_sold_item[0]} (Sold: {most_sold_item[1]['quantity']} units)", "most_sold")
-
-        self.report_text.config(state='disabled')
+        window = tk.Toplevel(self.root)
+        window.title("Reorder Suggestions")
+        center_window(window, 900, 500)
+        tk.Label(window, text="Items at or below their reorder point, soonest to run out first",
+                 font=("Arial", 13, "bold")).pack(pady=10)
+
+        columns = ("Item", "Stock", "Sold / Day", "Days of Stock", "Reorder Point")
+        tree = ttk.Treeview(window, columns=columns, show="headings")
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, anchor="center", width=160)
+        for item_id, name, stock, velocity, days_of_stock, reorder_point in suggestions:
+            tree.insert("", "end", values=(name, stock, f"{velocity:.2f}", f"{days_of_stock:.1f}", reorder_point))
+        tree.pack(fill="both", expand=True, padx=10, pady=10)
 
+    def report_failed(self, error):
+        self.report_job = None
+        messagebox.showerror("Error", f"Could not generate the report: {error}")
+
+    def cancel_report(self):
+        """Abandon the report that is currently being computed, if any."""
+        if self.report_job is not None:
+            self.report_job.cancel()
+            self.report_job = None
+
+    def on_busy(self, busy):
+        """Executor busy listener: show progress and enable Cancel while work is running."""
+        if not self.root.winfo_exists():
+            return
+        self.status_label.config(text="Working..." if busy else "")
+        self.cancel_button.config(state="normal" if busy else "disabled")
+        set_busy_cursor(self.root, busy)
 
     def close_report(self):
+        self.cancel_report()
+        self.executor.remove_busy_listener(self.on_busy)
         self.root.destroy()
         # self.main_window.deiconify()
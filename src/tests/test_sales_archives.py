@@ -0,0 +1,106 @@
+# test_sales_archives.py
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from database.inventory_db import Database, to_timestamp
+
+
+class SalesArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.db = Database(os.path.join(self.dir, "inventory.db"))
+        self.start, self.end = datetime(2020, 1, 1), datetime(2020, 12, 31)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def sell(self, date, quantity):
+        cursor = self.db.connection.cursor()
+        cursor.execute(
+            "INSERT INTO orders (order_total, total_items, order_date) VALUES (?, ?, ?)", (2.0 * quantity, quantity, date)
+        )
+        cursor.execute("""
+            INSERT INTO sales (order_id, item_id, item_name, unit_price, quantity, total_price, sale_date, sale_ts)
+            VALUES (?, 1, 'Widget', 2.0, ?, ?, ?, ?)
+        """, (cursor.lastrowid, quantity, 2.0 * quantity, date,
+              to_timestamp(datetime.strptime(date, '%Y-%m-%d %H:%M:%S'))))
+        self.db.connection.commit()
+
+    def assert_counted_once(self, orders, quantity):
+        self.assertEqual(len(self.db.get_sales_between_dates(self.start, self.end)), orders)
+        self.assertEqual(len(list(self.db.iter_orders_between_dates(self.start, self.end))), orders)
+        page = self.db.fetch_orders_page(None, 100, self.start, self.end)
+        self.assertEqual(len({order.order_id for order in page}), len(page))
+        self.assertEqual(len(page), orders)
+        report = self.db.aggregate_sales(self.start, self.end, group_by="order")
+        self.assertEqual(report["total_quantity"], quantity)
+        self.assertEqual(len(report["rows"]), orders)
+
+    def attached_archives(self):
+        return [row[1] for row in self.db.connection.execute("PRAGMA database_list") if row[1].startswith("archive_")]
+
+    def test_rearchiving_late_rows_never_double_counts(self):
+        self.sell("2020-03-01 10:00:00", 1)
+        self.sell("2020-04-01 10:00:00", 2)
+        self.assertEqual(self.db.archive_sales_year(2020), (2, 2))
+
+        # A late sale for the closed year, then a re-archive that stops after copying it
+        self.sell("2020-12-31 10:00:00", 5)
+        self.db.connection.execute(
+            "ATTACH DATABASE ? AS archive_2020", (os.path.join(self.dir, "inventory-sales-2020.db"),)
+        )
+        self.db.connection.execute(
+            "INSERT INTO archive_2020.sales SELECT sale_id, order_id, item_id, item_name, unit_price, quantity, "
+            "total_price, sale_date, sale_ts FROM main.sales"
+        )
+        self.db.connection.execute(
+            "INSERT INTO archive_2020.orders SELECT order_id, order_total, total_items, order_date, journal_id "
+            "FROM main.orders"
+        )
+        self.db.connection.commit()
+        self.assert_counted_once(3, 8)
+
+        # Running it again finishes the move
+        self.assertEqual(self.db.archive_sales_year(2020), (1, 1))
+        self.assert_counted_once(3, 8)
+        self.assertEqual(self.db.unarchived_years(2021), [])
+
+    def test_more_archived_years_than_can_be_attached(self):
+        this_year = datetime.now().year
+        years = list(range(this_year - 13, this_year))
+        for quantity, year in enumerate(years, 1):
+            self.sell(f"{year}-06-01 10:00:00", quantity)
+            self.db.archive_sales_year(year)
+        self.sell(datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 20)
+        self.start, self.end = datetime(years[0], 1, 1), datetime.now()
+
+        self.assertEqual(len(self.db.archived_years()), 13)
+        self.assert_counted_once(14, sum(range(1, 14)) + 20)
+        self.assertEqual(self.db.rebuild_daily_item_sales(), 14)
+
+        # A page filled from this database opens no archive; one deep in the past opens only its own year
+        for schema in self.attached_archives():
+            self.db.connection.execute(f"DETACH DATABASE {schema}")
+        self.assertEqual(len(self.db.fetch_orders_page(None, 1)), 1)
+        self.assertEqual(self.attached_archives(), [])
+        oldest = self.db.fetch_orders_page((f"{years[0]}-12-31 23:59:59", 0), 1)
+        self.assertEqual(oldest[0].order_date[:4], str(years[0]))
+        self.assertEqual(self.attached_archives(), [f"archive_{years[0]}"])
+
+        # Paging newest first crosses every archive in turn
+        seen, before = [], None
+        while True:
+            page = self.db.fetch_orders_page(before, 3)
+            if not page:
+                break
+            seen += page
+            before = (page[-1].order_date, page[-1].order_id)
+        self.assertEqual([order.order_date[:4] for order in seen], [str(this_year)] + [str(y) for y in reversed(years)])
+        self.assertEqual(self.db.fetch_order(seen[-1].order_id)[1][0].quantity, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+# test_sales_journal.py
+import contextlib
+import io
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from datetime import datetime
+from unittest import mock
+from database.file_lock import lock_file, unlock_file
+from database.inventory_db import TERMINAL_ID, Database, terminal_lock_path, to_timestamp
+from database.sales_journal import (
+    JournalLocked, SalesJournal, journal_path, read_journal, replay_journal, replay_journals
+)
+
+
+def journal_record(terminal_id, item_id, quantity, price=2.5):
+    """A record as SalesJournal.place_order writes it."""
+    now = datetime.now().replace(microsecond=0)
+    return {
+        "journal_id": uuid.uuid4().hex,
+        "terminal_id": terminal_id,
+        "order_date": now.strftime('%Y-%m-%d %H:%M:%S'),
+        "sale_ts": to_timestamp(now),
+        "lines": [[item_id, "Widget", price, quantity]],
+    }
+
+
+def leave_journal(path, records, torn_tail=False):
+    """Write a journal as a till that crashed before applying it would have left it."""
+    with open(path, "w", encoding="utf-8") as fp:
+        for record in records:
+            fp.write(json.dumps(record) + "\n")
+        if torn_tail:
+            fp.write('{"journal_id": "never-acknowl')
+
+
+class SalesJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.db_name = os.path.join(self.dir, "inventory.db")
+        self.db = Database(self.db_name)
+        self.db.add_item("Widget", 2.5, 100)
+        self.item_id = self.db.connection.execute("SELECT item_id FROM Items WHERE name = 'Widget'").fetchone()[0]
+        self.journals = []
+
+    def tearDown(self):
+        for journal in self.journals:
+            journal.close()
+        self.db.close()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def open_journal(self, terminal_id):
+        journal = SalesJournal(self.db_name, terminal_id)
+        self.journals.append(journal)
+        return journal
+
+    def stock(self):
+        return self.db.connection.execute("SELECT quantity FROM Items WHERE item_id = ?", (self.item_id,)).fetchone()[0]
+
+    def journaled_orders(self):
+        return self.db.connection.execute("SELECT COUNT(*) FROM orders WHERE journal_id IS NOT NULL").fetchone()[0]
+
+    def test_crash_replay_applies_acknowledged_orders_once(self):
+        self.db.reserve_stock(self.item_id, 3, terminal_id="till-a")
+        path = journal_path(self.db_name, "till-a")
+        leave_journal(path, [journal_record("till-a", self.item_id, 3)], torn_tail=True)
+
+        self.assertEqual(replay_journals(self.db_name), 1)
+        self.assertEqual(self.journaled_orders(), 1)
+        self.assertEqual(self.stock(), 97)
+        self.assertEqual(self.db.terminal_reservations([self.item_id], "till-a"), {})
+        self.assertEqual(read_journal(path), [])
+
+        # Replaying the same records again (a crash before the file was emptied) writes nothing twice
+        leave_journal(path, [journal_record("till-a", self.item_id, 1)])
+        record = read_journal(path)[0]
+        self.assertEqual(replay_journals(self.db_name), 1)
+        leave_journal(path, [record])
+        self.assertEqual(replay_journals(self.db_name), 0)
+        self.assertEqual(self.journaled_orders(), 2)
+        self.assertEqual(self.stock(), 96)
+
+    def test_reopening_a_journal_replays_it(self):
+        leave_journal(journal_path(self.db_name, "till-a"), [journal_record("till-a", self.item_id, 2)])
+        self.open_journal("till-a")
+        self.assertEqual(self.journaled_orders(), 1)
+        self.assertEqual(self.stock(), 98)
+
+    def test_tills_sharing_a_database_keep_their_own_journals(self):
+        # Till B crashed with an acknowledged order still in its journal
+        path_b = journal_path(self.db_name, "till-b")
+        leave_journal(path_b, [journal_record("till-b", self.item_id, 4)])
+
+        # Till A keeps selling; emptying its own journal must not touch B's
+        journal_a = self.open_journal("till-a")
+        self.assertNotEqual(journal_a.path, path_b)
+        self.db.reserve_stock(self.item_id, 5, terminal_id="till-a")
+        order_id, shortages, journal_id = journal_a.place_order(self.db, [(self.item_id, "Widget", 2.5, 5)])
+        self.assertIsNone(order_id)
+        self.assertIsNotNone(journal_id)
+        self.assertTrue(journal_a.drain(5))
+        self.assertEqual(read_journal(journal_a.path), [])
+        self.assertEqual(len(read_journal(path_b)), 1)
+
+        # Startup recovery lands B's order and skips A's journal, which A has open
+        self.assertEqual(replay_journals(self.db_name), 1)
+        self.assertEqual(self.journaled_orders(), 2)
+        self.assertEqual(self.stock(), 91)
+
+    def test_a_journal_is_open_in_one_process_at_a_time(self):
+        journal = self.open_journal("till-a")
+        with self.assertRaises(JournalLocked):
+            SalesJournal(self.db_name, "till-a")
+
+        # Replay leaves a journal alone while its till is running
+        with open(journal.path, "a", encoding="utf-8") as fp:
+            fp.write(json.dumps(journal_record("till-a", self.item_id, 1)) + "\n")
+        self.assertEqual(replay_journal(self.db_name, journal.path), 0)
+        self.assertEqual(len(read_journal(journal.path)), 1)
+
+    def test_an_oversold_journaled_order_is_reported(self):
+        self.db.connection.execute("UPDATE Items SET quantity = 2 WHERE item_id = ?", (self.item_id,))
+        self.db.connection.commit()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(self.db.apply_journaled_orders([journal_record("till-a", self.item_id, 5)]), 1)
+        self.assertEqual(self.stock(), 0)
+        self.assertIn("oversold 'Widget' by 3", output.getvalue())
+
+    def test_concurrent_orders_share_fsyncs(self):
+        journal = self.open_journal("till-a")
+        self.db.reserve_stock(self.item_id, 40, terminal_id="till-a")
+        fsyncs = []
+        real_fsync = os.fsync
+
+        def slow_fsync(fd):
+            fsyncs.append(fd)
+            time.sleep(0.01)  # Long enough for the other checkouts to queue behind it
+            real_fsync(fd)
+
+        def checkout():
+            db = Database(self.db_name)
+            try:
+                for _ in range(5):
+                    self.assertIsNotNone(journal.place_order(db, [(self.item_id, "Widget", 2.5, 1)])[2])
+            finally:
+                db.close()
+
+        with mock.patch("database.sales_journal.os.fsync", slow_fsync):
+            threads = [threading.Thread(target=checkout) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertTrue(journal.drain(5))
+        self.assertEqual(self.journaled_orders(), 40)
+        self.assertLess(len(fsyncs), 40)
+
+    def test_a_terminal_id_is_held_by_one_running_till(self):
+        name = f"test-till-{uuid.uuid4().hex}"
+        lock = lock_file(terminal_lock_path(name))
+        try:
+            # A second till started under a name in use falls back to <host name>:<pid>
+            output = subprocess.run(
+                [sys.executable, "-c", "from database.inventory_db import TERMINAL_ID; print(TERMINAL_ID)"],
+                env=dict(os.environ, INVENTORY_TILL_ID=name), capture_output=True, text=True, check=True,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            ).stdout
+        finally:
+            unlock_file(lock)
+        self.assertRegex(output.splitlines()[-1], rf"^{re.escape(socket.gethostname())}:\d+$")
+
+        # A fallback id left by a till that has exited is released at recovery; this till's own is not
+        exited = f"{socket.gethostname()}:{uuid.uuid4().int % 10 ** 9}"
+        self.db.reserve_stock(self.item_id, 1, terminal_id=exited)
+        self.db.reserve_stock(self.item_id, 1, terminal_id=TERMINAL_ID)
+        self.assertEqual(self.db.abandoned_terminals(), [exited])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,49 @@
 # ui/dashboard.py
 import tkinter as tk
-from tkinter import messagebox
-from database.inventory_db import Database
-from ui.registration import RegistrationWindow
-from ui.inventory_ui import InventoryDashboard
-from reports.sales_report import SalesReport
+from tkinter import messagebox, ttk
+from database.executor import get_executor
+from database.instrumentation import query_stats, profiling_requested
 from helper import center_window
 
+# The registration, inventory, report and order history windows are imported where they are first
+# opened, so logging in does not load modules the user may never use
+
+
+def build_low_stock_panel(parent, executor):
+    """Fill `parent` with the low-stock watchlist (an indexed read of the low_stock table, run on `executor`)."""
+    tk.Label(parent, text="Low Stock", font=("Arial", 16), bg="white").pack(pady=20)
+
+    columns = ("Item ID", "Item Name", "In Stock", "Reorder Level")
+    tree = ttk.Treeview(parent, columns=columns, show="headings")
+    for col in columns:
+        tree.heading(col, text=col)
+        tree.column(col, anchor="center", width=120)
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+    status = tk.Label(parent, text="", font=("Arial", 11), bg="white")
+    status.pack()
+
+    def load():
+        status.config(text="Loading...")
+        executor.submit(
+            lambda db: db.fetch_low_stock(),
+            on_done=show,
+            on_error=lambda e: status.winfo_exists() and status.config(text=f"Could not load low stock: {e}")
+        )
+
+    def show(items):
+        if not tree.winfo_exists():
+            return  # The panel was closed while the query ran
+        tree.delete(*tree.get_children())
+        for item in items:
+            tree.insert("", "end", values=(item.item_id, item.name, item.quantity, item.reorder_level))
+        status.config(text=f"{len(items)} item(s) at or below their reorder level" if items else "All items are above their reorder level")
+
+    tk.Button(parent, text="Refresh", command=load, font=("Arial", 12), padx=10).pack(pady=10)
+    load()
+
+
 class AdminDashboard:
     def __init__(self, main_window, login_window_instance):
-        self.db = Database()
         self.inventory_dashboard = None  # Add this line to store the InventoryDashboard instance
         self.main_window = main_window
         self.login_window_instance = login_window_instance
@@ -30,6 +64,9 @@ class AdminDashboard:
         self.add_sidebar_button("User Management", self.show_user_management)
         self.add_sidebar_button("Inventory Management", self.open_inventory_management)
         self.add_sidebar_button("Sales Reports", self.show_sales_reports)
+        self.add_sidebar_button("Low Stock", self.show_low_stock)
+        if profiling_requested():
+            self.add_sidebar_button("Query Stats", self.show_query_stats)
         
         # Logout button at the bottom of the sidebar
         logout_button = tk.Button(self.sidebar, text="Logout", command=self.logout, bg="#E74C3C", fg="white", relief="flat")
@@ -40,6 +77,18 @@ class AdminDashboard:
         button = tk.Button(self.sidebar, text=text, command=command, bg="#34495E", fg="white", relief="flat", height=2)
         button.pack(fill="x", padx=10, pady=5)
 
+    def show_query_stats(self):
+        """Show the database instrumentation summary (INVENTORY_DB_PROFILE=1)."""
+        self.clear_content_area()
+
+        label = tk.Label(self.content_area, text="Query Stats", font=("Arial", 16), bg="white")
+        label.pack(pady=20)
+
+        stats_text = tk.Text(self.content_area, font=("Courier", 10), wrap="none")
+        stats_text.insert(tk.END, query_stats.summary())
+        stats_text.config(state="disabled")
+        stats_text.pack(expand=True, fill="both", padx=10, pady=10)
+
     def show_user_management(self):
         # Clear the content area
         self.clear_content_area()
@@ -65,6 +114,10 @@ class AdminDashboard:
         manage_button = tk.Button(self.content_area, text="Manage Inventory", command=self.open_inventory_management)
         manage_button.pack(pady=10)
 
+    def show_low_stock(self):
+        self.clear_content_area()
+        build_low_stock_panel(self.content_area, get_executor(self.root))
+
     def show_sales_reports(self):
         # Clear the content area
         self.clear_content_area()
@@ -76,7 +129,11 @@ class AdminDashboard:
         view_button = tk.Button(self.content_area, text="View Sales Reports", bg="Cyan", command=self.view_sales_reports, font=("Arial", 14, "bold"), padx=10)
         view_button.pack(pady=10)
 
+        history_button = tk.Button(self.content_area, text="Order History", bg="lightyellow", command=self.view_order_history, font=("Arial", 14, "bold"), padx=10)
+        history_button.pack(pady=10)
+
     def open_registration_window(self):
+        from ui.registration import RegistrationWindow
         RegistrationWindow()
 
     def open_inventory_management(self):
@@ -84,16 +141,24 @@ class AdminDashboard:
 
         # If InventoryDashboard is not created, create and display it
         if not self.inventory_dashboard:
+            from ui.inventory_ui import InventoryDashboard
             self.inventory_dashboard = InventoryDashboard(self.content_area, "Admin")
         else:
             # Show the inventory dashboard again if it was previously created
             self.inventory_dashboard.create_ui()
 
     def view_sales_reports(self):
+        from reports.sales_report import SalesReport
         SalesReport(self.main_window, "Admin")
 
+    def view_order_history(self):
+        from reports.order_history import OrderHistory
+        OrderHistory(self.main_window, "Admin")
+
     def logout(self):
-        self.db.close()
+        query_stats.dump()  # Only writes anything when instrumentation is on
+        if self.inventory_dashboard:
+            self.inventory_dashboard.close()
         self.root.destroy()
         self.main_window.deiconify()
         self.login_window_instance.show()
@@ -106,7 +171,6 @@ class AdminDashboard:
 
 class CashierDashboard:
     def __init__(self, main_window, login_window_instance):
-        self.db = Database()
         self.main_window = main_window
         self.inventory_dashboard = None
         self.login_window_instance = login_window_instance
@@ -126,6 +190,7 @@ class CashierDashboard:
         # Add buttons to the sidebar
         self.add_sidebar_button("Inventory Management", self.open_inventory_management)
         self.add_sidebar_button("Sales Reports", self.show_sales_reports)
+        self.add_sidebar_button("Low Stock", self.show_low_stock)
         
         # Logout button at the bottom of the sidebar
         logout_button = tk.Button(self.sidebar, text="Logout", command=self.logout, bg="#E74C3C", fg="white", relief="flat")
@@ -147,6 +212,10 @@ class CashierDashboard:
         manage_button = tk.Button(self.content_area, text="Manage Inventory", command=self.open_inventory_management)
         manage_button.pack(pady=10)
 
+    def show_low_stock(self):
+        self.clear_content_area()
+        build_low_stock_panel(self.content_area, get_executor(self.root))
+
     def show_sales_reports(self):
         # Clear the content area
         self.clear_content_area()
@@ -158,14 +227,23 @@ class CashierDashboard:
         view_button = tk.Button(self.content_area, text="View Sales Reports", bg="Cyan", command=self.view_sales_reports, font=("Arial", 14, "bold"), padx=10)
         view_button.pack(pady=10)
 
+        history_button = tk.Button(self.content_area, text="Order History", bg="lightyellow", command=self.view_order_history, font=("Arial", 14, "bold"), padx=10)
+        history_button.pack(pady=10)
+
     def view_sales_reports(self):
+        from reports.sales_report import SalesReport
         SalesReport(self.main_window, "Cashier")
 
+    def view_order_history(self):
+        from reports.order_history import OrderHistory
+        OrderHistory(self.main_window, "Cashier")
+
     def open_inventory_management(self):
         self.clear_content_area()
 
         # If InventoryDashboard is not created, create and display it
         if not self.inventory_dashboard:
+            from ui.inventory_ui import InventoryDashboard
             self.inventory_dashboard = InventoryDashboard(self.content_area, "Cashier")
         else:
             # Show the inventory dashboard again if it was previously created
@@ -173,10 +251,12 @@ class CashierDashboard:
 
     def view_sales_report(self):
         # Open the Sales Report module
-        SalesReport(self.main_window, "Cashier")
+        self.view_sales_reports()
 
     def logout(self):
-        self.db.close()
+        query_stats.dump()  # Only writes anything when instrumentation is on
+        if self.inventory_dashboard:
+            self.inventory_dashboard.close()
         self.root.destroy()
         self.main_window.deiconify()  # Show the main (login) window
         self.login_window_instance.show()  # Reopen login window
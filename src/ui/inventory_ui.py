@@ -1,15 +1,55 @@
 # ui/inventory_ui.py
 import tkinter as tk
-from tkinter import messagebox, ttk
-from database.inventory_db import Database
-from helper import center_window
+from tkinter import filedialog, messagebox, ttk
+from database.inventory_db import ITEM_CHANGES_LIMIT, ITEMS_PAGE_SIZE
+from database.bulk_items import import_items_file, export_items_file
+from database.executor import TILL_LANE, get_executor
+from database.barcode_cache import BarcodeCache
+from database.sales_journal import get_sales_journal, journal_requested, replay_journals
+from models.cart import Cart, format_cents
+from helper import center_window, set_busy_cursor
+
+# Load the next page once the visible window gets this close to the last loaded row
+LOAD_MORE_THRESHOLD = 0.9
+
+# Pages of items kept in the table; pages further from the view are dropped and fetched again on the way back
+MAX_LOADED_PAGES = 5
+
+# Wait this long (ms) after the last keystroke before searching
+SEARCH_DELAY = 150
+
+# How often (ms) to pick up item changes made by other terminals
+ITEM_REFRESH_INTERVAL = 3000
 
 class InventoryDashboard:
     def __init__(self, root, role):
-        self.db = Database()
         self.role = role
         self.root = root
-        self.cart = []
+        self.cart = Cart()
+        self.barcodes = BarcodeCache()
+        self.refresh_job = None
+        self.search_job = None
+        self.search_query_job = None
+        self.items_job = None
+        self.refresh_query_job = None
+        self.order_job = None
+
+        # Every database call runs off the Tk thread. Checkout, cart holds and the item
+        # table run on the till lane, so imports, exports and searches on the
+        # background lane never hold up the counter
+        self.executor = get_executor(self.root)
+        self.till = get_executor(self.root, lane=TILL_LANE)
+        self.executor.add_busy_listener(self.on_busy)
+        self.till.add_busy_listener(self.on_busy)
+
+        # Opt-in: checkouts covered by this till's reservations are journaled and applied in
+        # batches. The journal is opened by recover_till; until then orders are placed directly.
+        self.sales_journal = None
+        self.till.submit(
+            self.recover_till,
+            on_done=self.till_recovered,
+            on_error=lambda e: messagebox.showerror("Error", f"Could not recover this till's previous session: {e}")
+        )
         self.create_ui()
 
     def create_ui(self):
@@ -26,16 +66,46 @@ class InventoryDashboard:
         items_frame = tk.Frame(self.root)
         items_frame.pack(side="left", fill="both", expand=True)
 
+        top_bar = tk.Frame(items_frame)
+        top_bar.pack(fill="x")
+
+        # Search box: ranked matches replace the paged listing while it has text
+        tk.Label(top_bar, text="Search:", font=("Arial", 12)).pack(side="left", padx=(10, 5), pady=10)
+        self.search_entry = tk.Entry(top_bar, font=("Arial", 12), width=30)
+        self.search_entry.pack(side="left", pady=10)
+        self.search_entry.bind("<KeyRelease>", self.on_search_changed)
+
+        # Barcode scanners type the code and press Enter; each scan adds one unit to the cart
+        tk.Label(top_bar, text="Scan:", font=("Arial", 12)).pack(side="left", padx=(15, 5), pady=10)
+        self.scan_entry = tk.Entry(top_bar, font=("Arial", 12), width=18)
+        self.scan_entry.pack(side="left", pady=10)
+        self.scan_entry.bind("<Return>", self.on_barcode_scanned)
+        self.scan_status = tk.Label(top_bar, text="", font=("Arial", 11), fg="gray")
+        self.scan_status.pack(side="left", padx=5)
+
         # Add 'Add Item' button
-        add_item_button = tk.Button(items_frame, text="Add Item", command=self.add_item_popup, bg="green",
+        add_item_button = tk.Button(top_bar, text="Add Item", command=self.add_item_popup, bg="green",
             fg="white",
             font=("Arial", 12),
             padx=10)
-        add_item_button.pack(anchor='ne', padx=10, pady=10)
+        add_item_button.pack(side="right", padx=10, pady=10)
+
+        # Bulk catalogue import/export
+        export_button = tk.Button(top_bar, text="Export Items", command=self.export_items, font=("Arial", 12), padx=10)
+        export_button.pack(side="right", pady=10)
+        import_button = tk.Button(top_bar, text="Import Items", command=self.import_items, font=("Arial", 12), padx=10)
+        import_button.pack(side="right", padx=10, pady=10)
 
         # Define columns for items table
         columns = ("Item ID", "Item Name", "Quantity", "Price", "Actions")
-        self.tree = ttk.Treeview(items_frame, columns=columns, show="headings")
+        table_frame = tk.Frame(items_frame)
+        table_frame.pack(fill="both", expand=True)
+        self.tree = ttk.Treeview(table_frame, columns=columns, show="headings")
+
+        # Scrolling near the end of the loaded rows pulls in the next page
+        self.tree_scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        self.tree_scrollbar.pack(side="right", fill="y")
+        self.tree.configure(yscrollcommand=self.on_items_scrolled)
 
         # Set up column headers
         for col in columns[:-1]:
@@ -61,17 +131,255 @@ class InventoryDashboard:
         self.quantity_entry.insert(0, "1")  # Default quantity is 1
         self.quantity_entry.pack(anchor="w", padx=10, pady=5)
 
+        # Keep the table in step with other terminals
+        self.schedule_items_refresh()
+
+    def item_row_values(self, item):
+        """Treeview values for an Item."""
+        return (item.item_id, item.name, item.quantity, f"${item.price:.2f}", "Edit || Delete || AddToCart")
+
     def populate_items_table(self):
-        # Clear existing data
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+        # Clear existing data; pages or changes still on their way belong to the old listing
+        for job in (self.items_job, self.refresh_query_job):
+            if job is not None:
+                job.cancel()
+        self.items_job = None
+        self.refresh_query_job = None
+        self.tree.delete(*self.tree.get_children())
+        self.item_rows = {}  # item_id -> Treeview iid
+        self.pages = []  # item_ids inserted by each loaded page, top of the table first
+        self.has_earlier_items = False  # Pages above the window have been dropped
+        self.last_loaded_id = None
+        self.all_items_loaded = False
+        self.loading_items = False
+        self.search_active = False
+        self.change_seq = None  # Set by the first page
+
+        # Only the first page is loaded; the rest follows as the user scrolls
+        self.load_more_items()
+
+    def load_more_items(self):
+        """Fetch the next page of items after the last loaded item_id on the till lane."""
+        if self.all_items_loaded or self.items_job is not None:
+            self.loading_items = self.items_job is not None
+            return
 
-        # Fetch items from the database
-        items = self.db.fetch_all_items()
-        
+        after = self.last_loaded_id
+        first_page = self.change_seq is None
+
+        def fetch(db):
+            # Read the change position first so anything changed while loading is re-applied
+            change_seq = db.latest_item_change() if first_page else None
+            return change_seq, db.fetch_items_page(after, ITEMS_PAGE_SIZE)
+
+        self.loading_items = True
+        self.items_job = self.till.submit(
+            fetch,
+            on_done=lambda result: self.show_items_page(*result),
+            on_error=self.items_failed
+        )
+
+    def load_earlier_items(self):
+        """Fetch the page just above the loaded window again, by keyset, on the till lane."""
+        if not self.has_earlier_items or not self.pages or self.items_job is not None:
+            self.loading_items = self.items_job is not None
+            return
+
+        before = self.pages[0][0]
+        self.loading_items = True
+        self.items_job = self.till.submit(
+            lambda db: db.fetch_items_page_before(before, ITEMS_PAGE_SIZE),
+            on_done=self.show_earlier_page,
+            on_error=self.items_failed
+        )
+
+    def show_items_page(self, change_seq, items):
+        """Append a page fetched by load_more_items, dropping the top page if the window is full."""
+        self.items_job = None
+        self.loading_items = False
+        if not self.tree.winfo_exists():
+            return
+        if change_seq is not None:
+            self.change_seq = change_seq
+
+        page = []
         for item in items:
-            # Insert item data with actions
-            self.tree.insert("", "end", values=(item[0], item[1], item[3], f"${item[2]:.2f}", "Edit || Delete || AddToCart"))
+            if item.item_id in self.item_rows:
+                self.tree.item(self.item_rows[item.item_id], values=self.item_row_values(item))
+            else:
+                # Insert item data with actions
+                self.item_rows[item.item_id] = self.tree.insert("", "end", values=self.item_row_values(item))
+                page.append(item.item_id)
+        if page:
+            self.pages.append(page)
+
+        if items:
+            self.last_loaded_id = items[-1].item_id
+        if len(items) < ITEMS_PAGE_SIZE:
+            self.all_items_loaded = True
+        if len(self.pages) > MAX_LOADED_PAGES:
+            self.drop_page(self.pages.pop(0), above=True)
+            self.has_earlier_items = True
+
+    def show_earlier_page(self, items):
+        """Put back a page fetched by load_earlier_items, dropping the bottom page if the window is full."""
+        self.items_job = None
+        self.loading_items = False
+        if not self.tree.winfo_exists():
+            return
+
+        top = self.top_row_index()
+        page = []
+        for item in items:
+            if item.item_id in self.item_rows:
+                self.tree.item(self.item_rows[item.item_id], values=self.item_row_values(item))
+            else:
+                self.item_rows[item.item_id] = self.tree.insert("", len(page), values=self.item_row_values(item))
+                page.append(item.item_id)
+        if page:
+            self.pages.insert(0, page)
+        self.show_from_row(top + len(page))  # The rows the user was looking at stay in view
+
+        if len(items) < ITEMS_PAGE_SIZE:
+            self.has_earlier_items = False
+        if len(self.pages) > MAX_LOADED_PAGES:
+            self.drop_page(self.pages.pop(), above=False)
+            # The dropped rows come back through load_more_items, after the new last row
+            self.last_loaded_id = self.pages[-1][-1]
+            self.all_items_loaded = False
+
+    def drop_page(self, item_ids, above):
+        """Remove a loaded page's rows from the table; above=True keeps the rows in view where they were."""
+        top = self.top_row_index()
+        iids = [self.item_rows.pop(item_id) for item_id in item_ids if item_id in self.item_rows]
+        self.tree.delete(*iids)
+        if above:
+            self.show_from_row(top - len(iids))
+
+    def top_row_index(self):
+        """Index of the first row in view."""
+        self.tree.update_idletasks()  # The Treeview recomputes its scroll position at layout time
+        return round(float(self.tree.yview()[0]) * len(self.tree.get_children()))
+
+    def show_from_row(self, index):
+        """Scroll the table so the row at `index` is the first in view."""
+        rows = len(self.tree.get_children())
+        if rows:
+            self.tree.update_idletasks()
+            self.tree.yview_moveto(max(index, 0) / rows)
+
+    def items_failed(self, error):
+        self.items_job = None
+        self.loading_items = False  # Scrolling again retries the page
+        messagebox.showerror("Error", f"Could not load items: {error}")
+
+    def on_items_scrolled(self, first, last):
+        """Treeview scroll callback: update the scrollbar and fetch rows near either end of the window."""
+        self.tree_scrollbar.set(first, last)
+        if self.loading_items:
+            return
+        if not self.all_items_loaded and float(last) >= LOAD_MORE_THRESHOLD:
+            self.loading_items = True
+            self.tree.after_idle(self.load_more_items)
+        elif self.has_earlier_items and float(first) <= 1 - LOAD_MORE_THRESHOLD:
+            self.loading_items = True
+            self.tree.after_idle(self.load_earlier_items)
+
+    def refresh_items_table(self):
+        """Fetch the item rows that changed since the last refresh on the till lane."""
+        if self.change_seq is None:
+            return  # The first page is still loading and reads the latest position itself
+
+        # A newer refresh supersedes one still in flight; both start from the same position
+        if self.refresh_query_job is not None:
+            self.refresh_query_job.cancel()
+        change_seq = self.change_seq
+        self.refresh_query_job = self.till.submit(
+            lambda db: db.fetch_item_changes(change_seq),
+            on_done=lambda result: self.apply_item_changes(*result)
+        )
+
+    def apply_item_changes(self, change_seq, changes):
+        """Apply only the item rows that changed since the last refresh."""
+        self.refresh_query_job = None
+        if not self.tree.winfo_exists():
+            return
+        self.change_seq = change_seq
+        for item_id, item in changes:
+            iid = self.item_rows.get(item_id)
+            if item is None:
+                # Deleted item
+                if iid is not None:
+                    self.tree.delete(iid)
+                    del self.item_rows[item_id]
+            elif iid is not None:
+                self.tree.item(iid, values=self.item_row_values(item))
+            elif self.all_items_loaded and not self.search_active:
+                # New items get the highest item_id, past the last page: keyset paging loads them from
+                # last_loaded_id, a page at a time, rather than inserting a whole import here
+                self.all_items_loaded = False
+            # Rows past the loaded window are picked up by paging
+
+        if not self.all_items_loaded and not self.search_active and self.tree.yview()[1] >= LOAD_MORE_THRESHOLD:
+            self.load_more_items()  # Already at the end: no scroll will ask for the new rows
+        if len(changes) >= ITEM_CHANGES_LIMIT:
+            self.tree.after_idle(self.refresh_items_table)  # More changes are waiting; take the next batch
+
+    def on_search_changed(self, event=None):
+        """Debounce keystrokes so a search runs once the user pauses typing."""
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(SEARCH_DELAY, self.run_search)
+
+    def run_search(self):
+        """Show ranked matches for the search box, or the paged listing when it is empty."""
+        self.search_job = None
+        query = self.search_entry.get().strip()
+        if not query:
+            self.populate_items_table()
+            return
+
+        if self.search_query_job is not None:
+            self.search_query_job.cancel()
+        self.search_query_job = self.executor.submit(
+            lambda db: (db.latest_item_change(), db.search_items(query)),
+            on_done=lambda result: self.show_search_results(query, *result)
+        )
+
+    def show_search_results(self, query, change_seq, items):
+        """Replace the table contents with the ranked matches for `query`."""
+        self.search_query_job = None
+        if not self.tree.winfo_exists() or self.search_entry.get().strip() != query:
+            return  # The user has kept typing; a newer search is on its way
+
+        if self.items_job is not None:
+            self.items_job.cancel()  # A page of the listing must not land among the matches
+            self.items_job = None
+            self.loading_items = False
+        self.change_seq = change_seq
+        self.tree.delete(*self.tree.get_children())
+        self.item_rows = {}
+        self.pages = []
+        self.has_earlier_items = False
+        for item in items:
+            self.item_rows[item.item_id] = self.tree.insert("", "end", values=self.item_row_values(item))
+
+        # Results are complete; no paging while searching
+        self.search_active = True
+        self.all_items_loaded = True
+
+    def schedule_items_refresh(self):
+        """Poll the item change log while the table is on screen."""
+        if self.refresh_job is not None:
+            self.root.after_cancel(self.refresh_job)
+        self.refresh_job = self.root.after(ITEM_REFRESH_INTERVAL, self.poll_item_changes)
+
+    def poll_item_changes(self):
+        self.refresh_job = None
+        if not self.tree.winfo_exists():
+            return
+        self.refresh_items_table()
+        self.schedule_items_refresh()
 
     def handle_actions(self, event):
         """Handle clicks on the 'Actions' column for Edit, Delete, or Add to Cart."""
@@ -102,14 +410,66 @@ class InventoryDashboard:
             messagebox.showerror("Error", "Quantity must be a positive integer.")
             return
 
-        if selected_quantity > int(quantity):
-            messagebox.showerror("Error", f"Only {quantity} units available in stock.")
+        self.reserve_for_cart(int(item_id), item_name, price, selected_quantity)
+
+    def on_barcode_scanned(self, event=None):
+        """Add one unit of the scanned item to the cart, found through the barcode cache."""
+        barcode = self.scan_entry.get().strip()
+        self.scan_entry.delete(0, tk.END)
+        if not barcode:
             return
 
-        cart_item = {"Item ID": item_id, "Item Name": item_name, "Quantity": selected_quantity, "Price": price}
-        self.cart.append(cart_item)
-        self.update_cart_summary()
-        messagebox.showinfo("Success", f"Added {selected_quantity} unit(s) of '{item_name}' to cart.")
+        # The cache is only touched from the till lane's worker
+        self.till.submit(
+            lambda db: self.barcodes.lookup(db, barcode),
+            on_done=lambda entry: self.barcode_found(barcode, entry),
+            on_error=lambda e: self.scan_status.config(text=f"Scan failed: {e}", fg="red")
+        )
+
+    def barcode_found(self, barcode, entry):
+        if entry is None:
+            self.root.bell()
+            self.scan_status.config(text=f"Unknown barcode {barcode}", fg="red")
+            return
+
+        item_id, item_name, price, stock = entry
+        if self.cart.quantity(item_id) + 1 > stock:
+            # Known short from the cached stock; no need to ask the database
+            self.root.bell()
+            self.scan_status.config(text=f"'{item_name}' is out of stock", fg="red")
+            return
+        self.reserve_for_cart(item_id, item_name, price, 1, scanned=True)
+
+    def reserve_for_cart(self, item_id, item_name, price, selected_quantity, scanned=False):
+        """Hold the stock for a cart addition, then add it to the cart."""
+        # The table may be stale when other terminals are selling, so check (and hold)
+        # the stock against the database rather than the quantity shown on screen,
+        # counting what is already in the cart as well as this request
+        in_cart = self.cart.quantity(item_id)
+        self.till.submit(
+            lambda db: db.reserve_stock(item_id, selected_quantity, in_cart=in_cart),
+            on_done=lambda result: self.cart_item_reserved(item_id, item_name, price, selected_quantity, *result,
+                                                           scanned=scanned),
+            on_error=lambda e: messagebox.showerror("Error", f"Could not reserve stock: {e}")
+        )
+
+    def cart_item_reserved(self, item_id, item_name, price, selected_quantity, ok, available, scanned=False):
+        if not ok:
+            message = f"Only {available} units of '{item_name}' available, including what is already in your cart."
+            if scanned:
+                self.root.bell()
+                self.scan_status.config(text=message, fg="red")
+            else:
+                messagebox.showerror("Error", message)
+            return
+
+        line, is_new = self.cart.add(item_id, item_name, price, selected_quantity)
+        self.update_cart_line(line, is_new)
+        if scanned:
+            # No dialog between scans; the cart line and this label are the confirmation
+            self.scan_status.config(text=f"Added '{item_name}'", fg="green")
+        else:
+            messagebox.showinfo("Success", f"Added {selected_quantity} unit(s) of '{item_name}' to cart.")
 
     def create_cart_summary(self):
         # Adjust the width of the cart frame
@@ -138,7 +498,8 @@ class InventoryDashboard:
 
     def clear_cart(self):
         """Clears the cart and updates the cart summary."""
-        self.cart = []  # Empty the cart
+        self.cart.clear()  # Empty the cart
+        self.till.submit(self.release_reservations)  # Give the held stock back
         self.update_cart_summary()  # Refresh the cart summary
         messagebox.showinfo("Cart Cleared", "All items have been removed from the cart.")
 
@@ -182,16 +543,12 @@ class InventoryDashboard:
         canvas.configure(yscrollcommand=scrollbar.set)
 
         # Display order items
-        for item in self.cart:
-            tk.Label(
-                scrollable_frame,
-                text=f"{item['Item Name']} x {item['Quantity']} - ${float(item['Price'].replace('$', '')) * item['Quantity']:.2f}",
-                font=("Arial", 12)
-            ).pack(anchor="w", pady=2)
+        for line in self.cart:
+            tk.Label(scrollable_frame, text=str(line), font=("Arial", 12)).pack(anchor="w", pady=2)
 
         # Display total items and total price
-        tk.Label(frame, text=f"Total Items: {sum(item['Quantity'] for item in self.cart)}", font=("Arial", 12)).pack(pady=5)
-        tk.Label(frame, text=f"Order Total: ${sum(float(item['Price'].replace('$', '')) * item['Quantity'] for item in self.cart):.2f}", font=("Arial", 12)).pack(pady=5)
+        tk.Label(frame, text=f"Total Items: {self.cart.total_items}", font=("Arial", 12)).pack(pady=5)
+        tk.Label(frame, text=f"Order Total: {format_cents(self.cart.total_cents)}", font=("Arial", 12)).pack(pady=5)
 
         # Buttons container
         buttons_frame = tk.Frame(frame, pady=10)
@@ -227,48 +584,95 @@ class InventoryDashboard:
             messagebox.showerror("Error", "Cart is empty. Add items to cart before checkout.")
             return
 
-        try:
-            total_items = sum(item["Quantity"] for item in self.cart)
-            order_total = sum(float(item["Price"].replace("$", "")) * item["Quantity"] for item in self.cart)
-
-            # Add a new order record
-            order_id = self.db.add_order(order_total, total_items)
+        if self.order_job is not None:
+            return  # This order is already being placed
 
-            # Add sales records and update stock for each cart item
-            for item in self.cart:
-                item_id = item["Item ID"]
-                item_name = item["Item Name"]
-                unit_price = float(item["Price"].replace("$", ""))
-                quantity = item["Quantity"]
+        lines = self.cart.order_lines()
 
-                # Deduct quantity from stock
-                self.db.update_item_stock(item_id, -quantity)
+        # Order header, sale lines and stock updates are written in one transaction, off the Tk thread
+        if self.sales_journal is not None:
+            place = lambda db: self.sales_journal.place_order(db, lines)
+        else:
+            place = lambda db: db.place_order(lines) + (None,)
+        self.order_job = self.till.submit(
+            place,
+            on_done=lambda result: self.order_placed(popup, *result),
+            on_error=self.order_failed
+        )
 
-                # Save sale record
-                self.db.add_sale(order_id, item_id, item_name, unit_price, quantity)
+    def order_placed(self, popup, order_id, shortages, journal_id=None):
+        self.order_job = None
+        if shortages:
+            details = "\n".join(
+                f"{name or item_id}: requested {requested}, available {available}"
+                for item_id, name, requested, available in shortages
+            )
+            messagebox.showerror("Insufficient Stock", f"The order was not placed:\n{details}")
+            return
 
-            # Clear the cart
+        # Clear the cart; a journaled order gets its number when the journal is applied
+        if journal_id is not None:
+            messagebox.showinfo("Success", f"Order placed successfully! (receipt {journal_id[:8]})")
+        else:
             messagebox.showinfo("Success", f"Order #{order_id} placed successfully!")
-            self.cart = []  # Clear the cart
-            self.update_cart_summary()
-            self.populate_items_table()
-            popup.destroy()
+        self.cart.clear()
+        self.update_cart_summary()
+        self.refresh_items_table()
+        popup.destroy()
 
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while saving the order: {e}")
+    def recover_till(self, db):
+        """Till startup: apply orders journaled by an earlier run, then drop its leftover holds.
+
+        Leftover journals are replayed whether or not journaling is on now.
+        This process holds the lock on TERMINAL_ID, so no other running till
+        shares it and the holds under it were left by an earlier run of this
+        till; those, and the holds of fallback ids whose tills have exited,
+        are released. Returns this till's SalesJournal, or None when
+        journaling is off.
+        """
+        replay_journals(db.db_name)
+        journal = get_sales_journal(db.db_name) if journal_requested() else None
+        if journal is not None:
+            journal.drain()
+        db.release_reservations()
+        for terminal_id in db.abandoned_terminals():
+            db.release_reservations(terminal_id)
+        return journal
+
+    def till_recovered(self, journal):
+        self.sales_journal = journal
+
+    def release_reservations(self, db):
+        """Drop this till's holds once any journaled orders they back have been applied."""
+        if self.sales_journal is not None:
+            self.sales_journal.drain()
+        db.release_reservations()
+
+    def order_failed(self, error):
+        self.order_job = None
+        messagebox.showerror("Error", f"An error occurred while saving the order: {error}")
+
+    def on_busy(self, busy):
+        """Executor busy listener: show a wait cursor over the dashboard while either lane is working."""
+        if self.root.winfo_exists():
+            set_busy_cursor(self.root.winfo_toplevel(), bool(self.executor.pending or self.till.pending))
 
     def update_cart_summary(self):
-        """Updates the cart summary with items and total price."""
+        """Redraw the whole cart summary from the cart."""
         self.cart_listbox.delete(0, tk.END)
-        total_price = 0.0
-
-        for item in self.cart:
-            item_price = float(item["Price"].replace("$", ""))
-            total_item_price = item_price * item["Quantity"]
-            total_price += total_item_price
-            self.cart_listbox.insert(tk.END, f"{item['Item Name']} x {item['Quantity']} - ${total_item_price:.2f}")
-
-        self.total_label.config(text=f"Total: ${total_price:.2f}")
+        for line in self.cart:
+            self.cart_listbox.insert(tk.END, str(line))
+        self.total_label.config(text=f"Total: {format_cents(self.cart.total_cents)}")
+
+    def update_cart_line(self, line, is_new):
+        """Show one added or changed cart line without redrawing the rest."""
+        if is_new:
+            self.cart_listbox.insert(tk.END, str(line))
+        else:
+            index = self.cart.position(line.item_id)
+            self.cart_listbox.delete(index)
+            self.cart_listbox.insert(index, str(line))
+        self.total_label.config(text=f"Total: {format_cents(self.cart.total_cents)}")
 
     def add_item_popup(self):
         """Opens a popup for adding a new item if the user role is not 'cashier'."""
@@ -338,51 +742,125 @@ class InventoryDashboard:
         if not price.replace('.', '', 1).isdigit() or float(price) <= 0:
             messagebox.showerror("Error", "Price must be a positive number.")
             return
-        if self.db.item_exists(name):
+
+        def add(db):
+            if db.item_exists(name):
+                return False
+            db.add_item(name, float(price), int(quantity))
+            return True
+
+        self.till.submit(
+            add,
+            on_done=lambda added: self.new_item_saved(popup, name, added),
+            on_error=lambda e: messagebox.showerror("Error", f"Could not add the item: {e}")
+        )
+
+    def new_item_saved(self, popup, name, added):
+        if not added:
             messagebox.showerror("Error", "An item with this name already exists.")
             return
-
-        self.db.add_item(name, float(price), int(quantity))
         messagebox.showinfo("Success", f"Item '{name}' added successfully.")
-        
-        self.populate_items_table()
+
+        self.refresh_items_table()
         popup.destroy()
 
+    def import_items(self):
+        """Bulk upsert items from a CSV/JSONL file on the background executor."""
+        if self.role == 'Cashier':
+            messagebox.showerror("Permission Denied", "You do not have permission to import items.")
+            return
+
+        path = filedialog.askopenfilename(
+            title="Import Items",
+            filetypes=[("Item files", "*.csv *.jsonl *.json"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        self.executor.submit(
+            lambda db: import_items_file(db, path),
+            on_done=lambda result: self.items_imported(*result),
+            on_error=lambda e: messagebox.showerror("Error", f"Import failed: {e}")
+        )
+
+    def items_imported(self, imported, rejected):
+        # One incremental refresh for the whole import
+        self.refresh_items_table()
+        message = f"Imported {imported} item(s)."
+        if rejected:
+            details = "\n".join(f"Line {line}: {reason}" for line, reason in rejected[:10])
+            more = f"\n... and {len(rejected) - 10} more" if len(rejected) > 10 else ""
+            message += f"\n\nRejected {len(rejected)} row(s):\n{details}{more}"
+        messagebox.showinfo("Import Items", message)
+
+    def export_items(self):
+        """Stream the whole catalogue to a CSV/JSONL file on the background executor."""
+        path = filedialog.asksaveasfilename(
+            title="Export Items",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")]
+        )
+        if not path:
+            return
+        self.executor.submit(
+            lambda db: export_items_file(db, path),
+            on_done=lambda written: messagebox.showinfo("Export Items", f"Exported {written} item(s) to {path}."),
+            on_error=lambda e: messagebox.showerror("Error", f"Export failed: {e}")
+        )
+
     def edit_item_popup(self, item_id):
+        """Fetch an item on the till lane, then open a popup for editing it."""
+        self.till.submit(
+            lambda db: db.fetch_item(item_id),
+            on_done=lambda item: self.show_edit_item_popup(item_id, item),
+            on_error=lambda e: messagebox.showerror("Error", f"Could not load the item: {e}")
+        )
+
+    def show_edit_item_popup(self, item_id, item):
         """Opens a popup for editing an existing item."""
-        item = self.db.fetch_item(item_id)
         if not item:
             messagebox.showerror("Error", "Item not found.")
             return
 
         popup = tk.Toplevel(self.root)
         popup.title("Edit Item")
-        center_window(popup, 400, 300)
+        center_window(popup, 400, 340)
 
         # Configure the grid layout for centering
         popup.grid_columnconfigure(0, weight=1)
         popup.grid_columnconfigure(1, weight=1)
-        popup.grid_rowconfigure(5, weight=1)
+        popup.grid_rowconfigure(6, weight=1)
 
         tk.Label(popup, text="Item Name:").grid(row=0, column=0, padx=10, pady=5)
         name_entry = tk.Entry(popup)
-        name_entry.insert(0, item[1])
+        name_entry.insert(0, item.name)
         name_entry.grid(row=0, column=1, padx=10, pady=5)
 
         tk.Label(popup, text="Quantity:").grid(row=1, column=0, padx=10, pady=5)
         quantity_entry = tk.Entry(popup)
-        quantity_entry.insert(0, item[3])
+        quantity_entry.insert(0, item.quantity)
         quantity_entry.grid(row=1, column=1, padx=10, pady=5)
 
         tk.Label(popup, text="Price:").grid(row=2, column=0, padx=10, pady=5)
         price_entry = tk.Entry(popup)
-        price_entry.insert(0, item[2])
+        price_entry.insert(0, item.price)
         price_entry.grid(row=2, column=1, padx=10, pady=5)
 
+        tk.Label(popup, text="Reorder Level:").grid(row=3, column=0, padx=10, pady=5)
+        reorder_entry = tk.Entry(popup)
+        reorder_entry.insert(0, item.reorder_level)
+        reorder_entry.grid(row=3, column=1, padx=10, pady=5)
+
+        tk.Label(popup, text="Barcode / SKU:").grid(row=4, column=0, padx=10, pady=5)
+        barcode_entry = tk.Entry(popup)
+        barcode_entry.insert(0, item.barcode or "")
+        barcode_entry.grid(row=4, column=1, padx=10, pady=5)
+
         # Disable fields if the user role is 'cashier'
         if self.role == 'Cashier':
             name_entry.config(state='disabled')
             price_entry.config(state='disabled')
+            reorder_entry.config(state='disabled')
+            barcode_entry.config(state='disabled')
 
 
         # Buttons
@@ -395,20 +873,22 @@ class InventoryDashboard:
             font=("Arial", 12), 
             padx=10
         )
-        cancel_button.grid(row=4, column=0, pady=10, sticky="e")  # Positioned to the left
+        cancel_button.grid(row=5, column=0, pady=10, sticky="e")  # Positioned to the left
 
-        update_button = tk.Button(popup, text="Update Item", command=lambda: self.update_item(popup, item_id, name_entry, quantity_entry, price_entry), bg="green", 
+        update_button = tk.Button(popup, text="Update Item", command=lambda: self.update_item(popup, item_id, name_entry, quantity_entry, price_entry, reorder_entry, barcode_entry), bg="green", 
             fg="white", 
             font=("Arial", 12), 
             padx=10)
-        update_button.grid(row=4, column=1, pady=10)
+        update_button.grid(row=5, column=1, pady=10)
 
 
-    def update_item(self, popup, item_id, name_entry, quantity_entry, price_entry):
+    def update_item(self, popup, item_id, name_entry, quantity_entry, price_entry, reorder_entry, barcode_entry):
         """Validates and updates an item in the database."""
         name = name_entry.get().strip()
         quantity = quantity_entry.get().strip()
         price = price_entry.get().strip()
+        reorder_level = reorder_entry.get().strip()
+        barcode = barcode_entry.get().strip() or None
 
         if not name:
             messagebox.showerror("Error", "Item name is required.")
@@ -419,11 +899,32 @@ class InventoryDashboard:
         if not price.replace('.', '', 1).isdigit() or float(price) <= 0:
             messagebox.showerror("Error", "Price must be a positive number.")
             return
+        if not reorder_level.isdigit():
+            messagebox.showerror("Error", "Reorder level must be a whole number (0 or more).")
+            return
+
+        def update(db):
+            """Returns the name of another item already using the barcode, or None once saved."""
+            if barcode:
+                owner = db.fetch_item_by_barcode(barcode)
+                if owner is not None and owner.item_id != int(item_id):
+                    return owner.name
+            db.update_item(item_id, name, float(price), int(quantity), int(reorder_level), barcode)
+            return None
+
+        self.till.submit(
+            update,
+            on_done=lambda owner: self.item_updated(popup, name, barcode, owner),
+            on_error=lambda e: messagebox.showerror("Error", f"Could not update the item: {e}")
+        )
 
-        self.db.update_item(item_id, name, float(price), int(quantity))
+    def item_updated(self, popup, name, barcode, owner):
+        if owner is not None:
+            messagebox.showerror("Error", f"Barcode {barcode} is already used by '{owner}'.")
+            return
         messagebox.showinfo("Success", f"Item '{name}' updated successfully.")
-        
-        self.populate_items_table()
+
+        self.refresh_items_table()
         popup.destroy()
 
     def delete_item(self, item_id):
@@ -433,5 +934,19 @@ class InventoryDashboard:
 
         """Deletes an item after confirmation."""
         if messagebox.askyesno("Delete Item", "Are you sure you want to delete this item?"):
-            self.db.delete_item(item_id)
-            self.populate_items_table()
+            self.till.submit(
+                lambda db: db.delete_item(item_id),
+                on_done=lambda result: self.refresh_items_table(),
+                on_error=lambda e: messagebox.showerror("Error", f"Could not delete the item: {e}")
+            )
+
+    def close(self):
+        """Stop polling and give back the stock this dashboard's cart still holds."""
+        if self.refresh_job is not None:
+            self.root.after_cancel(self.refresh_job)
+            self.refresh_job = None
+        self.executor.remove_busy_listener(self.on_busy)
+        self.till.remove_busy_listener(self.on_busy)
+        if self.cart:
+            self.cart.clear()
+            self.till.submit(self.release_reservations)
@@ -2,13 +2,15 @@ import tkinter as tk
 from tkinter import messagebox
 from tkinter import PhotoImage  # For adding the logo
 from database.inventory_db import Database
-from ui.dashboard import AdminDashboard, CashierDashboard
-from helper import center_window
+from database.executor import get_executor
+from helper import center_window, set_busy_cursor
 
 class LoginWindow:
     def __init__(self, root):
         self.db = Database()
         self.root = root
+        self.executor = get_executor(self.root)
+        self.executor.add_busy_listener(lambda busy: set_busy_cursor(self.root, busy))
         self.root.title("Login")
         self.root.geometry("300x200")
         center_window(self.root)
@@ -65,12 +67,24 @@ class LoginWindow:
         username = self.username_entry.get()
         password = self.password_entry.get()
 
-        user = self.db.get_user(username)
-        if user and user[2] == password:  # Check if the plain-text password matches
-            role = user[3]
+        # Look the user up off the Tk thread so a locked database cannot freeze the window
+        self.login_button.config(state="disabled")
+        self.executor.submit(
+            lambda db: db.get_user(username),
+            on_done=lambda user: self.finish_login(user, password),
+            on_error=self.login_failed
+        )
+
+    def finish_login(self, user, password):
+        self.login_button.config(state="normal")
+        if user and user.password == password:  # Check if the plain-text password matches
+            role = user.role
             messagebox.showinfo("Login Successful", f"Welcome, {role}")
             self.root.withdraw()  # Hide the main (login) window
 
+            # Imported on first login so the login window draws without loading the dashboards
+            from ui.dashboard import AdminDashboard, CashierDashboard
+
             # Open the appropriate dashboard based on the role
             if role == "Admin":
                 AdminDashboard(self.root, self)
@@ -79,6 +93,10 @@ class LoginWindow:
         else:
             messagebox.showerror("Error", "Invalid username or password")
 
+    def login_failed(self, error):
+        self.login_button.config(state="normal")
+        messagebox.showerror("Error", f"Could not check credentials: {error}")
+
     def show(self):
         """Show the login window again after logout."""
         self.setup_widgets()  # Reset the widgets in case of any previous login attempt
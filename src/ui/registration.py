@@ -11,6 +11,7 @@ class RegistrationWindow:
         self.root.title("Register New User")
         self.root.geometry("300x200")
         center_window(self.root, 400, 300)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
         self.username_label = tk.Label(self.root, text="Username:", font=("Arial", 12))
         self.username_label.pack(pady=5)
@@ -47,9 +48,10 @@ class RegistrationWindow:
         try:
             self.db.add_user(username, password, role)
             messagebox.showinfo("Success", "User registered successfully")
-            self.root.destroy()
+            self.close()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to register user: {e}")
 
     def close(self):
         self.db.close()
+        self.root.destroy()